@@ -0,0 +1,95 @@
+"""
+Helpers of the plain async Django views serving the hot read endpoints
+under ASGI. DRF views are sync only: these views read through the async
+ORM and reuse the DRF serializers on the fetched objects.
+"""
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    Throttled,
+)
+from rest_framework.settings import api_settings
+
+from posts import like_buffer
+from user.authentication import aauthenticate
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def error_response(exc: APIException) -> JsonResponse:
+    """
+    The response DRF's exception handler gives for `exc`.
+    """
+    data = exc.detail
+    if not isinstance(data, (list, dict)):
+        data = {"detail": data}
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = str(math.ceil(exc.wait))
+    return response
+
+
+async def acheck_throttles(request) -> None:
+    """
+    Applies the `DEFAULT_THROTTLE_CLASSES` as DRF's `check_throttles`
+    (the scope of `RedisScopedRateThrottle` is `anon` or `read`). Raises
+    `Throttled` with the longest wait when a throttle refuses the
+    request.
+    """
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not await sync_to_async(throttle.allow_request)(request, None):
+            waits.append(throttle.wait())
+    if waits:
+        waits = [wait for wait in waits if wait is not None]
+        raise Throttled(max(waits, default=None))
+
+
+def async_api_view(view=None, *, authenticated: bool = False):
+    """
+    Makes `view` a read-only endpoint: authenticates `request.user` by
+    JWT, throttles the request as the DRF views do and turns DRF
+    exceptions into their JSON responses. With `authenticated`,
+    anonymous requests get a 401.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in SAFE_METHODS:
+                    raise MethodNotAllowed(request.method)
+                request.user = await aauthenticate(request)
+                if authenticated and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                await acheck_throttles(request)
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                return error_response(exc)
+
+        return wrapper
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+async def aserialize(serializer_class, instance, request, many=False):
+    """
+    `serializer_class(instance).data`. Buffered like counts are read with
+    the sync Redis and ORM calls, so with the like buffer on the
+    serializer runs in a thread.
+    """
+    serializer = serializer_class(
+        instance, many=many, context={"request": request}
+    )
+    if like_buffer.is_enabled():
+        return await sync_to_async(lambda: serializer.data)()
+    return serializer.data
@@ -0,0 +1,149 @@
+"""
+Processing of uploaded images, run by Celery after the upload is saved.
+
+The original is rewritten without its EXIF data (after applying the EXIF
+orientation to the pixels), every frame of animated images included, and
+thumbnails of `THUMBNAIL_SIZES` are
+generated in every format of `THUMBNAIL_FORMATS`. The paths of the
+thumbnails are kept on the model as a `{size: {format: path}}` map.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, ImageSequence
+from rest_framework import serializers
+
+# Longest side of every thumbnail, in pixels.
+THUMBNAIL_SIZES = {"small": 320, "medium": 640, "large": 1280}
+THUMBNAIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+QUALITY = 85
+ORIGINAL_QUALITY = 95
+
+
+def encode(
+    image: Image.Image, image_format: str, quality: int, append_images=()
+) -> bytes:
+    """
+    Encodes `image`, followed by the frames `append_images`, as
+    `image_format`. No metadata is written.
+    """
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    options = {"quality": quality}
+    if append_images:
+        frames = [image, *append_images]
+        options.update(
+            save_all=True,
+            append_images=append_images,
+            duration=[frame.info.get("duration", 100) for frame in frames],
+            loop=image.info.get("loop", 0),
+        )
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def read_frames(image: Image.Image) -> list:
+    """
+    The frames of `image`, turned by their EXIF orientation. Only the
+    first one of MPO files (phone JPEGs followed by previews or depth
+    maps), which are then plain JPEGs.
+    """
+    if image.format == "MPO":
+        return [ImageOps.exif_transpose(image)]
+    return [
+        ImageOps.exif_transpose(frame.copy())
+        for frame in ImageSequence.Iterator(image)
+    ]
+
+
+def replace(storage, name: str, content: bytes) -> str:
+    """
+    Stores `content` as `name`, overwriting the existing file.
+    """
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def process_image(storage, name: str) -> dict:
+    """
+    Strips the EXIF data of the image `name` and generates its thumbnails.
+    Returns their `{size: {format: path}}` map.
+    """
+    with storage.open(name, "rb") as source:
+        image = Image.open(source)
+        original_format = "JPEG" if image.format == "MPO" else image.format
+        frames = read_frames(image)
+    image, *append_images = frames
+    replace(
+        storage,
+        name,
+        encode(image, original_format, ORIGINAL_QUALITY, append_images),
+    )
+
+    base, _ = os.path.splitext(name)
+    variants = {}
+    # Each thumbnail is scaled down from the previous, larger one.
+    thumbnail = image
+    for size_name, size in sorted(
+        THUMBNAIL_SIZES.items(), key=lambda item: item[1], reverse=True
+    ):
+        thumbnail = thumbnail.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        variants[size_name] = {
+            extension: replace(
+                storage,
+                f"{base}-{size_name}.{extension}",
+                encode(thumbnail, image_format, QUALITY),
+            )
+            for extension, image_format in THUMBNAIL_FORMATS.items()
+        }
+    return variants
+
+
+def schedule(task, instance, field_name: str) -> None:
+    """
+    Queues `task(instance.pk, file name)` for the image in `field_name`
+    once the current transaction commits.
+    """
+    name = getattr(instance, field_name).name
+    if name:
+        transaction.on_commit(lambda: task.delay(instance.pk, name))
+
+
+def delete_variants(storage, variants: dict) -> None:
+    """
+    Deletes the thumbnails of the `{size: {format: path}}` map `variants`
+    once the current transaction commits.
+    """
+    paths = [path for paths in variants.values() for path in paths.values()]
+
+    def delete():
+        for path in paths:
+            storage.delete(path)
+
+    if paths:
+        transaction.on_commit(delete)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Thumbnail URLs as a `{size: {format: url}}` map; empty until the
+    image is processed.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for size_name, paths in (value or {}).items():
+            urls[size_name] = {}
+            for extension, path in paths.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[size_name][extension] = url
+        return urls
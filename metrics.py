@@ -0,0 +1,216 @@
+"""
+Prometheus metrics of the API, served at `/metrics` to staff users and to
+scrapers sending `Authorization: Bearer <METRICS_TOKEN>`.
+
+`MetricsMiddleware` records the latency, the SQL query count and the
+database time of every request, labelled by the name of the matched URL
+(e.g. `posts:posts-list`), and counts the throttled (429) responses. With
+`EXPOSE_QUERY_COUNT_HEADER` it also returns the query count in the
+`X-DB-Query-Count` header.
+Serializers built on `TimedSerializerMixin` record how long rendering
+their `data` takes.
+
+Under several worker processes set `PROMETHEUS_MULTIPROC_DIR`, so that
+`/metrics` adds up the metrics of all of them.
+"""
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework import serializers
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to build the response",
+    ["route", "method"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries per request",
+    ["route", "method"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL queries per request",
+    ["route", "method"],
+)
+SERIALIZER_DURATION = Histogram(
+    "serializer_duration_seconds",
+    "Time to render the data of a serializer",
+    ["serializer"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+THROTTLED_REQUESTS = Counter(
+    "http_requests_throttled_total",
+    "Requests rejected by a throttle",
+    ["route"],
+)
+
+
+# `QueryStats` of the current request. A context variable, so that it
+# follows the request into the threads of `sync_to_async`.
+query_stats = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """
+    Execute wrapper that counts and times the queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of every connection, recording into the `QueryStats`
+    of the current request, if any.
+    """
+    stats = query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs) -> None:
+    # First, so that `connection.execute_wrapper()` blocks still pop their
+    # own wrapper when the connection opens inside them.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# Connections are per thread: cover the ones opened later as well.
+connection_created.connect(install_query_recorder)
+for connection in connections.all(initialized_only=True):
+    install_query_recorder(connection)
+
+
+def get_route(request) -> str:
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return UNMATCHED_ROUTE
+    return resolver_match.view_name
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Runs in the mode of the handler, so that async views don't go
+    through a thread.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            query_stats.reset(token)
+        return self.record(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            query_stats.reset(token)
+        return self.record(request, response, stats, start)
+
+    @staticmethod
+    def record(request, response, stats: QueryStats, start: float):
+        duration = time.perf_counter() - start
+        route = get_route(request)
+        REQUEST_DURATION.labels(route, request.method).observe(duration)
+        REQUEST_QUERIES.labels(route, request.method).observe(stats.count)
+        REQUEST_DB_DURATION.labels(route, request.method).observe(
+            stats.duration
+        )
+        if response.status_code == 429:
+            THROTTLED_REQUESTS.labels(route).inc()
+        if settings.EXPOSE_QUERY_COUNT_HEADER:
+            response[QUERY_COUNT_HEADER] = str(stats.count)
+        return response
+
+
+class TimedSerializerMixin:
+    """
+    Records the time `data` takes in `SERIALIZER_DURATION`. A list
+    serializer is timed as a whole, under the name of its child.
+    """
+
+    @property
+    def data(self):
+        name = type(getattr(self, "child", self)).__name__
+        with SERIALIZER_DURATION.labels(name).time():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    pass
+
+
+def can_read_metrics(request) -> bool:
+    if request.user.is_staff:
+        return True
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    expected = settings.METRICS_TOKEN
+    return (
+        bool(expected)
+        and scheme == "Bearer"
+        and hmac.compare_digest(token.encode(), expected.encode())
+    )
+
+
+def metrics_view(request):
+    if not can_read_metrics(request):
+        return HttpResponseForbidden()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
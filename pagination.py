@@ -1,7 +1,179 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
 
 class ListPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = "page_size"
     max_page_size = 10
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over `ordering`, which must end with a unique column.
+    Staff users can still ask for numbered pages with `?page=`.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 10
+    ordering = ("-id",)
+    page_number_pagination_class = ListPagination
+
+    page_number_paginator = None
+
+    def use_page_numbers(self, request) -> bool:
+        page_query_param = self.page_number_pagination_class.page_query_param
+        return bool(
+            page_query_param in request.query_params
+            and request.user
+            and request.user.is_staff
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_page_numbers(request):
+            self.page_number_paginator = self.page_number_pagination_class()
+            return self.page_number_paginator.paginate_queryset(
+                queryset.order_by(*self.ordering), request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SearchPaginationMixin:
+    """
+    View mixin that pages ranked search results (`?q=`) by number, since
+    relevance order is not a keyset.
+    """
+
+    search_query_param = "q"
+    search_pagination_class = ListPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get(self.search_query_param):
+                self._paginator = self.search_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class PostPagination(KeysetPagination):
+    ordering = ("-date_created", "-id")
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class AsyncKeysetPagination:
+    """
+    Keyset pagination for the async views, which can't use the DRF
+    paginators: those evaluate the queryset with the sync ORM.
+
+    `ordering` must be descending and end with a unique column. The cursor
+    is the `ordering` values of the last item of the page, so every page is
+    one `WHERE (...) < (...) LIMIT` query.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 10
+    cursor_query_param = "cursor"
+    ordering = ("-id",)
+
+    def __init__(self):
+        self.next_values = None
+
+    @property
+    def fields(self) -> list:
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            values = json.loads(b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return values
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        # DjangoJSONEncoder would cut datetimes to milliseconds.
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+        return b64encode(
+            json.dumps(values, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def filter_after(self, queryset, values):
+        """
+        Rows after `values` in `ordering`: a lexicographic "less than"
+        over the ordering columns.
+        """
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equal = {name: values[j] for j, name in enumerate(self.fields[:i])}
+            condition |= Q(**equal, **{f"{field}__lt": values[i]})
+        return queryset.filter(condition)
+
+    async def apaginate_queryset(self, queryset, request) -> list:
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if values is not None:
+            queryset = self.filter_after(queryset, values)
+        page = [item async for item in queryset[: page_size + 1]]
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_values = [
+                getattr(page[-1], field) for field in self.fields
+            ]
+        return page
+
+    def get_next_link(self, request):
+        if self.next_values is None:
+            return None
+        return replace_query_param(
+            request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_values),
+        )
+
+    def get_paginated_data(self, request, data) -> dict:
+        return {"next": self.get_next_link(request), "results": data}
+
+
+class AsyncPostPagination(AsyncKeysetPagination):
+    ordering = ("-date_created", "-id")
+
+
+class AsyncCommentPagination(AsyncKeysetPagination):
+    ordering = ("-created_at", "-id")
@@ -1,5 +1,7 @@
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
+from user.authentication import get_profile_id
+
 
 class IsAdminOrIfAuthenticatedReadOnly(BasePermission):
     def has_permission(self, request, view):
@@ -26,5 +28,5 @@ class IsAuthorOrReadOnly(BasePermission):
 
         return (
             request.user.is_authenticated
-            and obj.author == request.user.profile
+            and obj.author_id == get_profile_id(request.user)
         )
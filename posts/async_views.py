@@ -0,0 +1,69 @@
+"""
+Async variants of the post and comment read endpoints, for deployments
+under ASGI (`uvicorn social_media_api.asgi:application`). The responses
+are the same as those of the DRF views, without the search and filters.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import NotFound
+
+from async_api import aserialize, async_api_view
+from pagination import AsyncCommentPagination, AsyncPostPagination
+from posts import services
+from posts.models import Comments, Post
+from posts.serializers import (
+    CommentSerializer,
+    PostDetailSerializer,
+    PostListSerializer,
+)
+
+
+async def published_posts(user):
+    # `annotate_is_fan` builds no query, but may fill the ContentType cache.
+    return await sync_to_async(services.annotate_is_fan)(
+        Post.objects.filter(is_publish=True).select_related("author"), user
+    )
+
+
+@async_api_view
+async def post_list(request):
+    """
+    GET -> /async/posts/ -> newest published posts, by keyset pages
+    """
+    paginator = AsyncPostPagination()
+    posts = await paginator.apaginate_queryset(
+        await published_posts(request.user), request
+    )
+    data = await aserialize(PostListSerializer, posts, request, many=True)
+    return JsonResponse(paginator.get_paginated_data(request, data))
+
+
+@async_api_view
+async def post_detail(request, pk):
+    """
+    GET -> /async/posts/<id>/ -> the published post with the ID
+    """
+    queryset = await published_posts(request.user)
+    try:
+        post = await queryset.aget(pk=pk)
+    except Post.DoesNotExist:
+        raise NotFound()
+    data = await aserialize(PostDetailSerializer, post, request)
+    return JsonResponse(data)
+
+
+@async_api_view
+async def comment_list(request, post_pk):
+    """
+    GET -> /async/posts/<post_id>/comments/ -> comments of the post
+    """
+    queryset = await sync_to_async(services.annotate_is_fan)(
+        Comments.objects.filter(post_id=post_pk).select_related(
+            "post", "author"
+        ),
+        request.user,
+    )
+    paginator = AsyncCommentPagination()
+    comments = await paginator.apaginate_queryset(queryset, request)
+    data = await aserialize(CommentSerializer, comments, request, many=True)
+    return JsonResponse(paginator.get_paginated_data(request, data))
@@ -0,0 +1,176 @@
+"""
+Server-side cache of anonymous responses with tag-based invalidation.
+
+Every cached page stores the version of each tag it was built from.
+`invalidate()` gives a tag a new version, which turns every page built
+from it stale without having to know their keys. Versions start with the
+value of a shared counter, the tag clock, so that a page whose tags are
+only known once it is built (the posts of a list page) is not stored when
+one of them changed during the build.
+
+Pages also expire after a per-endpoint TTL. An expired page is kept for
+`STALE_GRACE` more seconds and served to everybody while a single worker,
+holding the rebuild lock, renders the new one.
+"""
+import hashlib
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+RESPONSE_CACHE_ALIAS = "responses"
+STALE_GRACE = 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 1.0
+LOCK_POLL_INTERVAL = 0.05
+CLOCK_KEY = "tag-clock"
+
+
+def get_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def post_tag(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def get_clock() -> int:
+    return get_cache().get(CLOCK_KEY, 0)
+
+
+def _new_version(clock: int) -> str:
+    return f"{clock}-{uuid.uuid4().hex}"
+
+
+def _version_clock(version: str) -> int:
+    """Clock of `version`; 0 for the versions made without one."""
+    clock, _, _ = version.rpartition("-")
+    return int(clock or 0)
+
+
+def get_tag_versions(tags) -> dict:
+    """
+    Returns the current version of every tag in `tags`, creating the
+    missing ones.
+    """
+    cache = get_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = keys.keys() - found.keys()
+    if missing:
+        clock = get_clock()
+        for key in missing:
+            cache.add(key, _new_version(clock), timeout=None)
+            found[key] = cache.get(key)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate(*tags) -> None:
+    """
+    Makes every page built from `tags` stale, once the current transaction
+    commits.
+    """
+
+    def bump():
+        cache = get_cache()
+        cache.add(CLOCK_KEY, 0, timeout=None)
+        clock = cache.incr(CLOCK_KEY)
+        cache.set_many(
+            {_tag_key(tag): _new_version(clock) for tag in tags},
+            timeout=None,
+        )
+
+    transaction.on_commit(bump, robust=True)
+
+
+def make_key(view_name: str, request) -> str:
+    """
+    Cache key of `request`: the view, the path and the sorted query params.
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.sha1(f"{request.path}?{query}".encode()).hexdigest()
+    return f"response:{view_name}:{digest}"
+
+
+def _is_current(entry) -> bool:
+    return (
+        entry is not None
+        and get_tag_versions(entry["versions"]) == entry["versions"]
+    )
+
+
+def _wait_for(key: str):
+    """
+    Waits for another worker to store `key`. Returns its entry if it is
+    stored in time.
+    """
+    cache = get_cache()
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if _is_current(entry):
+            return entry
+        if cache.get(f"lock:{key}") is None:
+            break
+    return None
+
+
+def get_or_build(key: str, ttl: int, tags, build):
+    """
+    Returns `(entry, is_hit)`: the cached entry for `key`, or the result
+    of `build()` when there is no usable one.
+
+    `build()` returns `(entry, extra_tags)`, where `entry` is a dict to
+    cache (None when the result must not be cached) and `extra_tags` are
+    the tags found while building, on top of `tags`. The entry is not
+    cached if one of `extra_tags` was invalidated after the build started:
+    it may hold the data from before.
+    """
+    cache = get_cache()
+    lock_key = f"lock:{key}"
+    entry = cache.get(key)
+    current = _is_current(entry)
+
+    if current and entry["expires_at"] > time.time():
+        return entry, True
+
+    locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not locked:
+        if current:
+            return entry, True
+        waited = _wait_for(key)
+        if waited is not None:
+            return waited, True
+
+    try:
+        started = get_clock()
+        versions = get_tag_versions(tags)
+        built, extra_tags = build()
+        if built is not None:
+            extra_versions = get_tag_versions(extra_tags)
+            finished = get_clock()
+            # Versions ahead of the clock predate a reset of the clock.
+            if not any(
+                started < _version_clock(version) <= finished
+                for version in extra_versions.values()
+            ):
+                versions.update(extra_versions)
+                built["versions"] = versions
+                built["expires_at"] = time.time() + ttl
+                cache.set(key, built, timeout=ttl + STALE_GRACE)
+        return built, False
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def get_ttl(view_name: str):
+    return settings.RESPONSE_CACHE_TTLS.get(view_name)
@@ -0,0 +1,237 @@
+"""
+Home timeline built with fan-out on write.
+
+Every profile has an inbox: a Redis sorted set of post ids scored by
+publication time. Publishing a post pushes its id into the inboxes of the
+author and their followers, but only into inboxes that already exist.
+Inboxes expire after `FEED_INBOX_TTL` without reads, so inactive users cost
+nothing on write and get their inbox rebuilt from the database the next
+time they open the feed.
+"""
+from datetime import datetime, timezone
+
+import redis
+from django.conf import settings
+from django.db.models import Q
+
+from posts.models import Post
+from social_media_api import redis_client
+from user.models import Follow
+
+FAN_OUT_BATCH_SIZE = 1000
+
+# Lowest-ranked member of every inbox, so that an empty feed is still cached.
+SENTINEL = 0
+
+# Adds a post to an inbox only if the inbox is live, then trims it while
+# keeping the sentinel at rank 0.
+PUSH_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("ZADD", KEYS[1], ARGV[1], ARGV[2])
+    redis.call("ZREMRANGEBYRANK", KEYS[1], 1, -1 - tonumber(ARGV[3]))
+    return 1
+end
+return 0
+"""
+
+
+# Reads a page of an inbox at or below the score ARGV[1], refreshing its
+# TTL (ARGV[3]); false when the inbox is not live. Redis orders equal scores
+# by member bytes, not by post id, so the page is widened to every entry
+# at ARGV[1] plus ARGV[2] entries below, and the whole group tied with the
+# last of them. The caller sorts and cuts it.
+READ_SCRIPT = """
+if redis.call("EXPIRE", KEYS[1], ARGV[3]) == 0 then
+    return false
+end
+local limit = tonumber(ARGV[2])
+if ARGV[1] ~= "+inf" then
+    limit = limit + redis.call("ZCOUNT", KEYS[1], ARGV[1], ARGV[1])
+end
+local page = redis.call(
+    "ZREVRANGEBYSCORE", KEYS[1], ARGV[1], "-inf", "WITHSCORES",
+    "LIMIT", 0, limit
+)
+if #page > 0 then
+    local last = page[#page]
+    local ties = redis.call("ZRANGEBYSCORE", KEYS[1], last, last, "WITHSCORES")
+    for _, value in ipairs(ties) do
+        table.insert(page, value)
+    end
+end
+return page
+"""
+
+
+def inbox_key(profile_id: int) -> str:
+    return f"feed:inbox:{profile_id}"
+
+
+def post_score(post: Post) -> float:
+    return post.date_created.timestamp()
+
+
+def get_follower_ids(author_id: int):
+    """
+    Ids of profiles that should see posts of `author_id`, the author included.
+    """
+    yield author_id
+    yield from (
+        Follow.objects.filter(followee_id=author_id)
+        .values_list("follower_id", flat=True)
+        .iterator(chunk_size=FAN_OUT_BATCH_SIZE)
+    )
+
+
+def fan_out(post: Post) -> int:
+    """
+    Pushes `post` into every live inbox of its audience. Returns the number
+    of inboxes updated.
+    """
+    client = redis_client.get_redis()
+    push = client.register_script(PUSH_SCRIPT)
+    score = post_score(post)
+    updated = 0
+    pipe = client.pipeline(transaction=False)
+    for index, profile_id in enumerate(get_follower_ids(post.author_id), 1):
+        push(
+            keys=[inbox_key(profile_id)],
+            args=[score, post.id, settings.FEED_INBOX_SIZE],
+            client=pipe,
+        )
+        if index % FAN_OUT_BATCH_SIZE == 0:
+            updated += sum(pipe.execute())
+    updated += sum(pipe.execute())
+    return updated
+
+
+def get_feed_queryset(profile_id: int):
+    """
+    Published posts of `profile_id` and of every profile it follows.
+    """
+    followed = Follow.objects.filter(follower_id=profile_id).values(
+        "followee_id"
+    )
+    return (
+        Post.objects.filter(is_publish=True)
+        .filter(Q(author_id=profile_id) | Q(author_id__in=followed))
+        .select_related("author")
+        .order_by("-date_created", "-id")
+    )
+
+
+def rebuild_inbox(profile_id: int) -> None:
+    """
+    Fills the inbox of `profile_id` from the database.
+    """
+    posts = get_feed_queryset(profile_id).values_list("id", "date_created")
+    mapping = {
+        post_id: date_created.timestamp()
+        for post_id, date_created in posts[: settings.FEED_INBOX_SIZE]
+    }
+    mapping[SENTINEL] = float("-inf")
+    key = inbox_key(profile_id)
+    pipe = redis_client.get_redis().pipeline()
+    pipe.delete(key)
+    pipe.zadd(key, mapping)
+    pipe.expire(key, settings.FEED_INBOX_TTL)
+    pipe.execute()
+
+
+def drop_inbox(profile_id: int) -> None:
+    """
+    Forgets the inbox of `profile_id`; the next read rebuilds it.
+    """
+    redis_client.get_redis().delete(inbox_key(profile_id))
+
+
+def is_after(score: float, post_id: int, before) -> bool:
+    """
+    Checks if the entry `(score, post_id)` comes after the cursor `before`,
+    a `(score, post_id)` pair, in the feed order. A cursor without a post id
+    is past every post of its score.
+    """
+    before_score, before_id = before
+    if score != before_score:
+        return score < before_score
+    return before_id is not None and post_id < before_id
+
+
+def read_inbox(profile_id: int, count: int, before=None):
+    """
+    Returns up to `count` `(post_id, score)` pairs after the cursor
+    `before`, newest first, or None when the inbox is not cached.
+    """
+    client = redis_client.get_redis()
+    read = client.register_script(READ_SCRIPT)
+    values = read(
+        keys=[inbox_key(profile_id)],
+        args=[
+            repr(before[0]) if before is not None else "+inf",
+            count,
+            settings.FEED_INBOX_TTL,
+        ],
+    )
+    if values is None:
+        return None
+    entries = {
+        (float(score), int(post_id))
+        for post_id, score in zip(values[::2], values[1::2])
+        if int(post_id) != SENTINEL
+    }
+    if before is not None:
+        entries = {
+            (score, post_id)
+            for score, post_id in entries
+            if is_after(score, post_id, before)
+        }
+    return [
+        (post_id, score)
+        for score, post_id in sorted(entries, reverse=True)[:count]
+    ]
+
+
+def get_feed(profile_id: int, count: int, before=None):
+    """
+    Returns a page of the home timeline of `profile_id` as a list of posts
+    and the cursor of the next page (None on the last page). Cursors are
+    `(score, post_id)` pairs, so posts sharing a publication time are
+    neither skipped nor repeated across pages.
+
+    Reads come from the Redis inbox. When it is missing, or Redis is down,
+    the page is queried from the database and the inbox is rebuilt in the
+    background.
+    """
+    from posts.tasks import rebuild_feed
+
+    try:
+        entries = read_inbox(profile_id, count, before)
+    except redis.RedisError:
+        entries = None
+    else:
+        if entries is None:
+            rebuild_feed.delay(profile_id)
+
+    if entries is None:
+        queryset = get_feed_queryset(profile_id)
+        if before is not None:
+            before_score, before_id = before
+            before_date = datetime.fromtimestamp(before_score, tz=timezone.utc)
+            after = Q(date_created__lt=before_date)
+            if before_id is not None:
+                after |= Q(date_created=before_date, id__lt=before_id)
+            queryset = queryset.filter(after)
+        posts = list(queryset[:count])
+        entries = [(post.id, post_score(post)) for post in posts]
+    else:
+        by_id = Post.objects.filter(
+            pk__in=[post_id for post_id, _ in entries], is_publish=True
+        ).select_related("author").in_bulk()
+        posts = [
+            by_id[post_id] for post_id, _ in entries if post_id in by_id
+        ]
+
+    if len(entries) < count:
+        return posts, None
+    post_id, score = entries[-1]
+    return posts, (score, post_id)
@@ -0,0 +1,243 @@
+"""
+Write-behind buffer for likes, enabled by `settings.LIKES_WRITE_BEHIND`.
+
+Like and unlike only record the wanted state of the user in Redis and
+return; no `Like` row and no `like_count` is touched, so a viral post is
+not locked by every fan. `flush()` writes the net changes to Postgres in
+batches and recalculates the stored counters.
+
+Every buffered object has:
+
+* `likes:pending:<type>:<id>`  - hash of user id -> "1" (liked) or "0";
+* `likes:delta:<type>:<id>`    - change of the like count not flushed yet;
+* a `<type>:<id>` member in the `likes:dirty` set.
+
+A flush renames the pending hash and delta to `likes:flushing:...` before
+writing them, so new likes keep going to a fresh hash meanwhile. Reads
+look at the pending hash, then at the flushing one, then at the database.
+A flush that died halfway is retried from the flushing keys, and writing
+them twice is harmless.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from posts import cache as response_cache
+from posts.models import Like, Post
+from social_media_api import redis_client
+
+DIRTY_KEY = "likes:dirty"
+
+# Sets the state of a user if it changes. Without a buffered state and
+# without the database one (ARGV[3] == "") it returns -1 to ask for it.
+# Returns 1 if the state changed.
+SET_STATE_SCRIPT = """
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+if not current then
+    current = redis.call("HGET", KEYS[2], ARGV[1])
+end
+if not current then
+    if ARGV[3] == "" then
+        return -1
+    end
+    current = ARGV[3]
+end
+if current == ARGV[2] then
+    return 0
+end
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+redis.call("INCRBY", KEYS[3], ARGV[2] == "1" and 1 or -1)
+redis.call("SADD", KEYS[4], ARGV[4])
+return 1
+"""
+
+# Moves the pending changes of an object aside for flushing, unless an
+# earlier flush left some there. Returns the states to write.
+SNAPSHOT_SCRIPT = """
+if redis.call("EXISTS", KEYS[2]) == 0 then
+    if redis.call("EXISTS", KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call("RENAME", KEYS[1], KEYS[2])
+    if redis.call("EXISTS", KEYS[3]) == 1 then
+        redis.call("RENAME", KEYS[3], KEYS[4])
+    end
+end
+return redis.call("HGETALL", KEYS[2])
+"""
+
+# Drops the flushed changes; the object stays dirty if new ones came in.
+FINISH_SCRIPT = """
+redis.call("DEL", KEYS[1], KEYS[2])
+if redis.call("EXISTS", KEYS[3]) == 0 then
+    redis.call("SREM", KEYS[4], ARGV[1])
+end
+return 0
+"""
+
+DELETE_LIKES_SQL = """
+    DELETE FROM {like_table}
+    WHERE content_type_id = %(content_type)s
+    AND object_id = %(object_id)s
+    AND user_id = ANY(%(users)s)
+"""
+
+COUNT_LIKES_SQL = """
+    UPDATE {table} SET like_count = (
+        SELECT COUNT(*) FROM {like_table}
+        WHERE content_type_id = %(content_type)s
+        AND object_id = %(object_id)s
+    )
+    WHERE id = %(object_id)s
+"""
+
+
+def is_enabled() -> bool:
+    return settings.LIKES_WRITE_BEHIND
+
+
+def member(content_type_id: int, object_id: int) -> str:
+    return f"{content_type_id}:{object_id}"
+
+
+def _keys(content_type_id: int, object_id: int) -> dict:
+    suffix = member(content_type_id, object_id)
+    return {
+        "pending": f"likes:pending:{suffix}",
+        "flushing": f"likes:flushing:{suffix}",
+        "delta": f"likes:delta:{suffix}",
+        "flushing_delta": f"likes:flushing-delta:{suffix}",
+    }
+
+
+def set_like(obj, user, liked: bool) -> bool:
+    """
+    Buffers the like state of `user` on `obj`. Returns True if the state
+    changed.
+    """
+    client = redis_client.get_redis()
+    script = client.register_script(SET_STATE_SCRIPT)
+    obj_type = ContentType.objects.get_for_model(obj)
+    keys = _keys(obj_type.id, obj.pk)
+    script_keys = [keys["pending"], keys["flushing"], keys["delta"], DIRTY_KEY]
+    args = [user.pk, "1" if liked else "0", "", member(obj_type.id, obj.pk)]
+    changed = script(keys=script_keys, args=args)
+    if changed == -1:
+        stored = Like.objects.filter(
+            content_type=obj_type, object_id=obj.pk, user=user
+        ).exists()
+        args[2] = "1" if stored else "0"
+        changed = script(keys=script_keys, args=args)
+    return changed == 1
+
+
+def load(keys, user=None):
+    """
+    Reads the buffered state of the objects `keys`, given as
+    `(content_type_id, pk)` pairs, in one round trip.
+
+    Returns `(deltas, states)`: the like count delta of each buffered
+    object and, when `user` is given, their buffered like state, both
+    keyed like `keys`.
+    """
+    keys = list(keys)
+    pipe = redis_client.get_redis().pipeline(transaction=False)
+    for obj_type_id, pk in keys:
+        names = _keys(obj_type_id, pk)
+        pipe.mget(names["delta"], names["flushing_delta"])
+        if user is not None:
+            pipe.hget(names["pending"], user.pk)
+            pipe.hget(names["flushing"], user.pk)
+    replies = iter(pipe.execute())
+    deltas, states = {}, {}
+    for key in keys:
+        delta = sum(int(value) for value in next(replies) if value)
+        if delta:
+            deltas[key] = delta
+        if user is not None:
+            pending, flushing = next(replies), next(replies)
+            state = pending if pending is not None else flushing
+            if state is not None:
+                states[key] = state == b"1"
+    return deltas, states
+
+
+def _write(model, obj_type_id: int, pk: int, states: dict, batch_size: int):
+    """
+    Applies the flushed `states` of one object and recounts its likes.
+    """
+    liked = [user_id for user_id, state in states.items() if state == "1"]
+    unliked = [user_id for user_id, state in states.items() if state == "0"]
+    # Users deleted since they liked the object can't get a row.
+    liked = list(
+        get_user_model()
+        .objects.filter(pk__in=liked)
+        .values_list("pk", flat=True)
+    )
+    with transaction.atomic():
+        if not model.objects.filter(pk=pk).exists():
+            return
+        Like.objects.bulk_create(
+            [
+                Like(content_type_id=obj_type_id, object_id=pk, user_id=uid)
+                for uid in liked
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        params = {"content_type": obj_type_id, "object_id": pk}
+        tables = {
+            "like_table": Like._meta.db_table,
+            "table": model._meta.db_table,
+        }
+        with connection.cursor() as cursor:
+            for start in range(0, len(unliked), batch_size):
+                cursor.execute(
+                    DELETE_LIKES_SQL.format(**tables),
+                    {**params, "users": unliked[start : start + batch_size]},
+                )
+            cursor.execute(COUNT_LIKES_SQL.format(**tables), params)
+        if model is Post:
+            response_cache.invalidate(response_cache.post_tag(pk))
+
+
+def flush(batch_size: int) -> int:
+    """
+    Writes the buffered likes to the database. Returns the number of
+    objects flushed.
+    """
+    client = redis_client.get_redis()
+    snapshot = client.register_script(SNAPSHOT_SCRIPT)
+    finish = client.register_script(FINISH_SCRIPT)
+    flushed = 0
+    for value in client.sscan_iter(DIRTY_KEY, count=batch_size):
+        name = value.decode()
+        obj_type_id, pk = map(int, name.split(":"))
+        keys = _keys(obj_type_id, pk)
+        reply = snapshot(
+            keys=[
+                keys["pending"],
+                keys["flushing"],
+                keys["delta"],
+                keys["flushing_delta"],
+            ]
+        )
+        states = {
+            int(reply[index]): reply[index + 1].decode()
+            for index in range(0, len(reply), 2)
+        }
+        if states:
+            model = ContentType.objects.get_for_id(obj_type_id).model_class()
+            _write(model, obj_type_id, pk, states, batch_size)
+            flushed += 1
+        finish(
+            keys=[
+                keys["flushing"],
+                keys["flushing_delta"],
+                keys["pending"],
+                DIRTY_KEY,
+            ],
+            args=[name],
+        )
+    return flushed
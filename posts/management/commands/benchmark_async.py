@@ -0,0 +1,126 @@
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+
+PATHS = {
+    "post list": ("/api/posts/", "/api/async/posts/"),
+    "post detail": ("/api/posts/{post}/", "/api/async/posts/{post}/"),
+    "comment list": (
+        "/api/posts/{post}/comments/",
+        "/api/async/posts/{post}/comments/",
+    ),
+    "profile detail": (
+        "/api/user/user_profile/{profile}/",
+        "/api/user/async/user_profile/{profile}/",
+    ),
+}
+
+
+class Command(BaseCommand):
+    """
+    Django command that compares the sync (WSGI) and async (ASGI) read
+    endpoints under many concurrent connections. Both servers must be
+    running, e.g.:
+
+        gunicorn -w 4 social_media_api.wsgi -b :8000
+        uvicorn --workers 4 social_media_api.asgi:application --port 8001
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync-server",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the WSGI server",
+        )
+        parser.add_argument(
+            "--async-server",
+            default="http://127.0.0.1:8001",
+            help="Base URL of the ASGI server",
+        )
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=500,
+            help="Number of concurrent connections",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=5000,
+            help="Number of requests per endpoint and server",
+        )
+        parser.add_argument("--post", type=int, default=1, help="Post ID")
+        parser.add_argument(
+            "--profile", type=int, default=1, help="User profile ID"
+        )
+        parser.add_argument(
+            "--token",
+            help="JWT access token, required by the profile endpoints",
+        )
+
+    async def run(self, url: str, options: dict) -> tuple:
+        """
+        Sends `requests` GETs to `url` over `connections` connections.
+        Returns the seconds taken, the latencies and the failure count.
+        """
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+        latencies = []
+        failures = 0
+        remaining = options["requests"]
+
+        async def worker(session):
+            nonlocal remaining, failures
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status != 200:
+                            failures += 1
+                except aiohttp.ClientError:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+        connector = aiohttp.TCPConnector(limit=options["connections"])
+        async with aiohttp.ClientSession(
+            connector=connector, headers=headers
+        ) as session:
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(worker(session) for _ in range(options["connections"]))
+            )
+            seconds = time.perf_counter() - start
+        return seconds, latencies, failures
+
+    def report(self, name: str, seconds: float, latencies, failures: int):
+        latencies = sorted(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f"  {name}: {len(latencies) / seconds:.0f} requests/sec, "
+            f"p50 {statistics.median(latencies) * 1000:.0f}ms, "
+            f"p99 {p99 * 1000:.0f}ms, {failures} failed"
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["connections"] <= 0 or options["requests"] <= 0:
+            raise CommandError("--connections and --requests must be > 0")
+        ids = {"post": options["post"], "profile": options["profile"]}
+        for endpoint, (sync_path, async_path) in PATHS.items():
+            if "{profile}" in sync_path and not options["token"]:
+                self.stdout.write(f"{endpoint}: skipped, needs --token")
+                continue
+            self.stdout.write(f"{endpoint}:")
+            for name, server, path in (
+                ("WSGI", options["sync_server"], sync_path),
+                ("ASGI", options["async_server"], async_path),
+            ):
+                url = server.rstrip("/") + path.format(**ids)
+                self.report(name, *asyncio.run(self.run(url, options)))
+        self.stdout.write(self.style.SUCCESS("Benchmark finished!"))
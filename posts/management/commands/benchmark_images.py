@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+
+import images
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class Command(BaseCommand):
+    """Django command that measures image processing throughput"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            help="Directory with the images to process",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        source = options["source"]
+        if not os.path.isdir(source):
+            raise CommandError(f"{source} is not a directory")
+        names = sorted(
+            name
+            for name in os.listdir(source)
+            if name.lower().endswith(EXTENSIONS)
+        )
+        if not names:
+            raise CommandError(f"No images found in {source}")
+
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location)
+            for name in names:
+                with open(os.path.join(source, name), "rb") as file:
+                    storage.save(name, file)
+            input_size = directory_size(location)
+
+            start = time.perf_counter()
+            for name in names:
+                images.process_image(storage, name)
+            seconds = time.perf_counter() - start
+            output_size = directory_size(location)
+
+        self.stdout.write(
+            f"{len(names)} images in {seconds:.2f}s, "
+            f"{len(names) / seconds:.1f} images/sec"
+        )
+        self.stdout.write(
+            f"Input {input_size / 2**20:.1f} MB, "
+            f"output {output_size / 2**20:.1f} MB "
+            "(stripped originals and thumbnails)"
+        )
+        self.stdout.write(self.style.SUCCESS("Benchmark finished!"))
@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+
+from posts import like_buffer, services
+from posts.models import Post
+from user.models import UserProfile
+
+User = get_user_model()
+
+EMAIL_PATTERN = "benchmark-like-{}@example.com"
+
+
+class Command(BaseCommand):
+    """Django command that measures likes/sec with and without the buffer"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Number of users liking the same post",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Number of concurrent threads sending likes",
+        )
+
+    def like_all(self, post: Post, users: list, workers: int) -> float:
+        """Like `post` by every user from `workers` threads, return seconds"""
+
+        def like_chunk(chunk):
+            try:
+                for user in chunk:
+                    services.add_like(Post(pk=post.pk, like_count=0), user)
+            finally:
+                connections.close_all()
+
+        chunks = [users[index::workers] for index in range(workers)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(like_chunk, chunks))
+        return time.perf_counter() - start
+
+    def report(self, name: str, count: int, seconds: float) -> None:
+        self.stdout.write(
+            f"{name}: {count} likes in {seconds:.2f}s, "
+            f"{count / seconds:.0f} likes/sec"
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        count, workers = options["users"], options["workers"]
+        users = User.objects.bulk_create(
+            User(email=EMAIL_PATTERN.format(index), password="!")
+            for index in range(count)
+        )
+        author = UserProfile.objects.create(user=users[0])
+        post = Post.objects.create(
+            title="benchmark", author=author, content="benchmark"
+        )
+        try:
+            with override_settings(LIKES_WRITE_BEHIND=False):
+                seconds = self.like_all(post, users, workers)
+            self.report("Direct", count, seconds)
+
+            post.likes.all().delete()
+            Post.objects.filter(pk=post.pk).update(like_count=0)
+
+            with override_settings(LIKES_WRITE_BEHIND=True):
+                seconds = self.like_all(post, users, workers)
+                self.report("Buffered", count, seconds)
+                start = time.perf_counter()
+                like_buffer.flush(batch_size=1000)
+                self.report("Flush", count, time.perf_counter() - start)
+
+            post.refresh_from_db()
+            self.stdout.write(f"Stored like count: {post.like_count}")
+        finally:
+            post.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished!"))
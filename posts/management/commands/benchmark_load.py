@@ -0,0 +1,290 @@
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+
+import aiohttp
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from rest_framework_simplejwt.tokens import AccessToken
+
+from metrics import QUERY_COUNT_HEADER
+from posts.models import Post
+from user.models import UserProfile
+
+User = get_user_model()
+
+# name: (method, path, body); `{post}`, `{profile}` and `{word}` are
+# filled with a random published post, profile and search word.
+ENDPOINTS = {
+    "post list": ("GET", "/api/posts/", None),
+    "post search": ("GET", "/api/posts/?q={word}", None),
+    "post detail": ("GET", "/api/posts/{post}/", None),
+    "comment list": ("GET", "/api/posts/{post}/comments/", None),
+    "feed": ("GET", "/api/feed/", None),
+    "profile detail": ("GET", "/api/user/user_profile/{profile}/", None),
+    "profile search": ("GET", "/api/user/user_profile/?q={word}", None),
+    "like": ("POST", "/api/posts/{post}/like/", None),
+    "unlike": ("POST", "/api/posts/{post}/unlike/", None),
+    "comment create": (
+        "POST",
+        "/api/posts/{post}/comment/create/",
+        {"content": "benchmark comment"},
+    ),
+    "post create": (
+        "POST",
+        "/api/post/create/",
+        {"title": "benchmark", "content": "benchmark post"},
+    ),
+    "follow": (
+        "POST",
+        "/api/user/user_profile/{profile}/followers-add/",
+        None,
+    ),
+    "unfollow": (
+        "POST",
+        "/api/user/user_profile/{profile}/followers-remove/",
+        None,
+    ),
+}
+WORDS = ("coffee", "travel", "music", "python", "sunset", "football")
+# Rounds of random ids `Command.sample` looks up before giving up.
+SAMPLE_ROUNDS = 10
+
+
+def percentile(values: list, fraction: float) -> float:
+    """`fraction` percentile of the sorted `values`"""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Django command that drives the main read and write endpoints of a
+    running server, as random seeded users (see `seed_social_graph`), and
+    reports throughput, latency percentiles and SQL queries per request
+    as JSON, e.g.:
+
+        manage.py benchmark_load --output before.json
+        manage.py benchmark_load --output after.json
+
+    The query counts come from the `X-DB-Query-Count` header, so run the
+    server with `EXPOSE_QUERY_COUNT_HEADER=True`. Relax the
+    `THROTTLE_*_RATE` settings of the server too, or most requests are
+    throttled.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of concurrent connections",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Number of requests per endpoint",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Number of users the requests are sent as",
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=1000,
+            help="Number of posts and profiles the requests target",
+        )
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=ENDPOINTS,
+            default=list(ENDPOINTS),
+            metavar="ENDPOINT",
+            help=f"Endpoints to drive, of: {', '.join(ENDPOINTS)}",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed"
+        )
+        parser.add_argument("--output", help="File to write the JSON to")
+
+    def sample(self, rng: random.Random, queryset, count: int) -> list:
+        """
+        Up to `count` random pks of `queryset`. Random ids between the
+        lowest and the highest pk are looked up in rounds, so that only
+        the sample is loaded.
+        """
+        bounds = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+        low, high = bounds["low"], bounds["high"]
+        if low is None:
+            raise CommandError(
+                f"No {queryset.model.__name__} rows; "
+                "run seed_social_graph first"
+            )
+        if high - low < count:
+            return list(queryset.order_by("pk").values_list("pk", flat=True))
+        found = set()
+        for _ in range(SAMPLE_ROUNDS):
+            candidates = {
+                rng.randint(low, high) for _ in range(count - len(found))
+            }
+            found.update(
+                queryset.filter(pk__in=candidates - found).values_list(
+                    "pk", flat=True
+                )
+            )
+            if len(found) >= count:
+                break
+        if not found:
+            raise CommandError(
+                f"No {queryset.model.__name__} rows found in "
+                f"{SAMPLE_ROUNDS} rounds of random ids"
+            )
+        # Sorted, so that the same seed draws the same requests.
+        return sorted(found)
+
+    async def run(self, requests: list, options: dict) -> dict:
+        """
+        Sends `requests` as `(method, url, body, token)` over
+        `concurrency` connections and returns their stats.
+        """
+        latencies = []
+        queries = []
+        failures = 0
+        throttled = 0
+        pending = iter(requests)
+
+        async def worker(session):
+            nonlocal failures, throttled
+            for method, url, body, token in pending:
+                headers = {"Authorization": f"Bearer {token}"}
+                start = time.perf_counter()
+                try:
+                    async with session.request(
+                        method, url, json=body, headers=headers
+                    ) as response:
+                        await response.read()
+                        if response.status == 429:
+                            throttled += 1
+                        elif response.status >= 400:
+                            failures += 1
+                        if QUERY_COUNT_HEADER in response.headers:
+                            queries.append(
+                                int(response.headers[QUERY_COUNT_HEADER])
+                            )
+                except aiohttp.ClientError:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+        connector = aiohttp.TCPConnector(limit=options["concurrency"])
+        async with aiohttp.ClientSession(connector=connector) as session:
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(worker(session) for _ in range(options["concurrency"]))
+            )
+            seconds = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "failures": failures,
+            "throttled": throttled,
+            "requests_per_second": round(len(latencies) / seconds, 1),
+            "latency_ms": {
+                name: round(percentile(latencies, fraction) * 1000, 1)
+                for name, fraction in (
+                    ("p50", 0.5),
+                    ("p90", 0.9),
+                    ("p99", 0.99),
+                    ("max", 1),
+                )
+            },
+            "queries_per_request": {
+                "mean": round(statistics.fmean(queries), 2)
+                if queries
+                else None,
+                "max": max(queries, default=None),
+            },
+        }
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["concurrency"] <= 0 or options["requests"] <= 0:
+            raise CommandError("--concurrency and --requests must be > 0")
+        rng = random.Random(options["seed"])
+        tokens = [
+            str(AccessToken.for_user(User(pk=user_id)))
+            for user_id in self.sample(
+                rng,
+                User.objects.filter(profile__isnull=False),
+                options["users"],
+            )
+        ]
+        post_ids = self.sample(
+            rng, Post.objects.filter(is_publish=True), options["sample"]
+        )
+        profile_ids = self.sample(
+            rng, UserProfile.objects.all(), options["sample"]
+        )
+        server = options["server"].rstrip("/")
+
+        results = {}
+        for endpoint in options["endpoints"]:
+            method, path, body = ENDPOINTS[endpoint]
+            requests = [
+                (
+                    method,
+                    server
+                    + path.format(
+                        post=rng.choice(post_ids),
+                        profile=rng.choice(profile_ids),
+                        word=rng.choice(WORDS),
+                    ),
+                    body,
+                    rng.choice(tokens),
+                )
+                for _ in range(options["requests"])
+            ]
+            results[endpoint] = asyncio.run(
+                self.run(requests, options)
+            )
+
+        report = json.dumps(
+            {
+                "commit": current_commit(),
+                "server": server,
+                "concurrency": options["concurrency"],
+                "seed": options["seed"],
+                "endpoints": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report + "\n")
+            self.stdout.write(self.style.SUCCESS("Benchmark finished!"))
+        else:
+            self.stdout.write(report)
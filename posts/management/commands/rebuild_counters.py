@@ -0,0 +1,89 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comments, Like, Post
+from user.models import Follow, UserProfile
+
+
+def count_subquery(queryset, field: str):
+    """Correlated `COUNT(*)` of `queryset` rows pointing at the outer pk"""
+    counted = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted), 0)
+
+
+class Command(BaseCommand):
+    """
+    Django command that recalculates stored like, comment and follow
+    counters
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated per transaction",
+        )
+
+    def rebuild(self, model, batch_size: int, **counters) -> int:
+        """Update `counters` of every `model` row, `batch_size` rows a time"""
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return updated
+            with transaction.atomic():
+                updated += model.objects.filter(pk__in=ids).update(
+                    **counters
+                )
+            last_id = ids[-1]
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        batch_size = options["batch_size"]
+
+        post_likes = Like.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post)
+        )
+        comment_likes = Like.objects.filter(
+            content_type=ContentType.objects.get_for_model(Comments)
+        )
+
+        posts = self.rebuild(
+            Post,
+            batch_size,
+            like_count=count_subquery(post_likes, "object_id"),
+            comment_count=count_subquery(Comments.objects.all(), "post_id"),
+        )
+        self.stdout.write(f"Posts updated: {posts}")
+
+        comments = self.rebuild(
+            Comments,
+            batch_size,
+            like_count=count_subquery(comment_likes, "object_id"),
+        )
+        self.stdout.write(f"Comments updated: {comments}")
+
+        profiles = self.rebuild(
+            UserProfile,
+            batch_size,
+            followers_count=count_subquery(Follow.objects.all(), "followee"),
+            following_count=count_subquery(Follow.objects.all(), "follower"),
+        )
+        self.stdout.write(f"Profiles updated: {profiles}")
+
+        self.stdout.write(self.style.SUCCESS("Counters rebuilt!"))
@@ -0,0 +1,244 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.models import Comments, Like, Post
+from user.models import Follow, UserProfile
+
+User = get_user_model()
+
+EMAIL_PATTERN = "seed-{}@example.com"
+WORDS = (
+    "coffee morning travel music city photo weekend friends summer book "
+    "movie garden coding python django running coast mountain sunset "
+    "recipe dinner concert album winter snow football match news idea "
+    "project startup design art museum train flight beach forest river"
+).split()
+
+# Spreads `date_created` of the seeded posts evenly over a period, in
+# insertion order, so that lists and feeds see a realistic timeline.
+SPREAD_DATES_SQL = """
+UPDATE {table}
+SET date_created = %(start)s + (id - %(first_id)s) * %(step)s
+WHERE id BETWEEN %(first_id)s AND %(last_id)s
+"""
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def power_law_weights(rng: random.Random, count: int, alpha: float) -> list:
+    """
+    Pareto weights of `count` items: a few items get most of the picks,
+    most items get very few.
+    """
+    return [rng.paretovariate(alpha) for _ in range(count)]
+
+
+def picker(rng: random.Random, population: list, weights) -> callable:
+    """
+    Returns a function picking an item of `population` by `weights`.
+    """
+    cum_weights = list(itertools.accumulate(weights))
+    indexes = range(len(population))
+
+    def pick():
+        return population[rng.choices(indexes, cum_weights=cum_weights)[0]]
+
+    return pick
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+class Command(BaseCommand):
+    """
+    Django command that fills the database with a synthetic social graph.
+
+    Users differ in how active and how popular they are, both drawn from a
+    power law: a few users write most of the posts, get most of the follows
+    and their posts most of the likes and comments. The same `--seed`
+    generates the same graph on an empty database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=100_000, help="Number of users"
+        )
+        parser.add_argument(
+            "--posts", type=int, default=1_000_000, help="Number of posts"
+        )
+        parser.add_argument(
+            "--comments",
+            type=int,
+            default=1_000_000,
+            help="Number of comments",
+        )
+        parser.add_argument(
+            "--likes",
+            type=int,
+            default=5_000_000,
+            help="Number of likes tried; duplicates are skipped",
+        )
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=2_000_000,
+            help="Number of follows tried; duplicates are skipped",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.2,
+            help="Pareto shape; lower is more skewed",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Period the posts are spread over",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of rows inserted per query",
+        )
+
+    def insert(self, model, rows, batch_size: int, **kwargs) -> list:
+        """
+        Inserts `rows` with `bulk_create`, `batch_size` rows per
+        transaction. Returns the new ids, none with `ignore_conflicts`.
+        """
+        ids = []
+        count = 0
+        start = time.perf_counter()
+        for chunk in chunked(rows, batch_size):
+            with transaction.atomic():
+                created = model.objects.bulk_create(chunk, **kwargs)
+            ids.extend(obj.pk for obj in created if obj.pk is not None)
+            count += len(chunk)
+        self.stdout.write(
+            f"{model.__name__}: {count} rows in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        return ids
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if User.objects.filter(email=EMAIL_PATTERN.format(0)).exists():
+            raise CommandError(
+                "The database is already seeded; flush it before reseeding"
+            )
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        alpha = options["alpha"]
+
+        user_ids = self.insert(
+            User,
+            (
+                User(email=EMAIL_PATTERN.format(index), password="!")
+                for index in range(options["users"])
+            ),
+            batch_size,
+        )
+        profile_ids = self.insert(
+            UserProfile,
+            (
+                UserProfile(user_id=user_id, username=text(rng, 2))
+                for user_id in user_ids
+            ),
+            batch_size,
+        )
+        activity = power_law_weights(rng, len(profile_ids), alpha)
+        popularity = power_law_weights(rng, len(profile_ids), alpha)
+        pick_author = picker(rng, range(len(profile_ids)), activity)
+        pick_followee = picker(rng, profile_ids, popularity)
+
+        authors = [pick_author() for _ in range(options["posts"])]
+        post_ids = self.insert(
+            Post,
+            (
+                Post(
+                    author_id=profile_ids[author],
+                    title=text(rng, 4),
+                    content=text(rng, 30),
+                )
+                for author in authors
+            ),
+            batch_size,
+        )
+        if post_ids:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    SPREAD_DATES_SQL.format(table=Post._meta.db_table),
+                    {
+                        "start": timezone.now()
+                        - timedelta(days=options["days"]),
+                        "first_id": post_ids[0],
+                        "last_id": post_ids[-1],
+                        "step": timedelta(days=options["days"])
+                        / len(post_ids),
+                    },
+                )
+            # Posts of popular authors draw the likes and comments.
+            pick_post = picker(
+                rng, post_ids, (popularity[author] for author in authors)
+            )
+            pick_commenter = picker(rng, profile_ids, activity)
+            self.insert(
+                Comments,
+                (
+                    Comments(
+                        post_id=pick_post(),
+                        author_id=pick_commenter(),
+                        content=text(rng, 12),
+                    )
+                    for _ in range(options["comments"])
+                ),
+                batch_size,
+            )
+            content_type = ContentType.objects.get_for_model(Post)
+            self.insert(
+                Like,
+                (
+                    Like(
+                        user_id=rng.choice(user_ids),
+                        content_type=content_type,
+                        object_id=pick_post(),
+                    )
+                    for _ in range(options["likes"])
+                ),
+                batch_size,
+                ignore_conflicts=True,
+            )
+
+        def follows():
+            for _ in range(options["follows"]):
+                follower = rng.choice(profile_ids)
+                followee = pick_followee()
+                if follower != followee:
+                    yield Follow(follower_id=follower, followee_id=followee)
+
+        if len(profile_ids) > 1:
+            self.insert(Follow, follows(), batch_size, ignore_conflicts=True)
+
+        call_command(
+            "rebuild_counters", batch_size=batch_size, stdout=self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS("Social graph seeded!"))
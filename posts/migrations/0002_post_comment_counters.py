@@ -0,0 +1,50 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comments",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE posts_post p SET
+                    like_count = (
+                        SELECT COUNT(*) FROM posts_like l
+                        JOIN django_content_type ct ON ct.id = l.content_type_id
+                        WHERE ct.app_label = 'posts' AND ct.model = 'post'
+                        AND l.object_id = p.id
+                    ),
+                    comment_count = (
+                        SELECT COUNT(*) FROM posts_comments c
+                        WHERE c.post_id = p.id
+                    );
+                UPDATE posts_comments c SET
+                    like_count = (
+                        SELECT COUNT(*) FROM posts_like l
+                        JOIN django_content_type ct ON ct.id = l.content_type_id
+                        WHERE ct.app_label = 'posts' AND ct.model = 'comments'
+                        AND l.object_id = c.id
+                    );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0002_post_comment_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comments",
+            index=models.Index(
+                fields=["post", "-created_at", "-id"], name="comment_post_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_publish", True)),
+                fields=["-date_created", "-id"],
+                name="post_published_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "-date_created", "-id"], name="post_author_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce({row}.content, '')), 'B')
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="post_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(
+            sql=f"""
+                CREATE FUNCTION posts_post_search_vector_update()
+                RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row="NEW")};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER posts_post_search_vector_trigger
+                BEFORE INSERT OR UPDATE OF title, content ON posts_post
+                FOR EACH ROW EXECUTE FUNCTION posts_post_search_vector_update();
+
+                UPDATE posts_post
+                SET search_vector = {SEARCH_VECTOR_SQL.format(row="posts_post")};
+            """,
+            reverse_sql="""
+                DROP TRIGGER posts_post_search_vector_trigger ON posts_post;
+                DROP FUNCTION posts_post_search_vector_update();
+            """,
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0004_post_search_vector"),
+    ]
+
+    operations = [
+        # Drop duplicate likes, keeping the oldest one, and take them back
+        # out of the stored counters.
+        migrations.RunSQL(
+            sql="""
+                WITH removed AS (
+                    DELETE FROM posts_like a
+                    USING posts_like b
+                    WHERE a.content_type_id = b.content_type_id
+                    AND a.object_id = b.object_id
+                    AND a.user_id = b.user_id
+                    AND a.id > b.id
+                    RETURNING a.content_type_id, a.object_id
+                ),
+                per_object AS (
+                    SELECT ct.model, removed.object_id, COUNT(*) AS total
+                    FROM removed
+                    JOIN django_content_type ct
+                    ON ct.id = removed.content_type_id
+                    WHERE ct.app_label = 'posts'
+                    GROUP BY ct.model, removed.object_id
+                ),
+                posts AS (
+                    UPDATE posts_post p
+                    SET like_count = GREATEST(p.like_count - po.total, 0)
+                    FROM per_object po
+                    WHERE po.model = 'post' AND p.id = po.object_id
+                )
+                UPDATE posts_comments c
+                SET like_count = GREATEST(c.like_count - po.total, 0)
+                FROM per_object po
+                WHERE po.model = 'comments' AND c.id = po.object_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["user", "content_type", "object_id"],
+                name="like_user_object_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id", "user"),
+                name="unique_like",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0005_like_unique_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="publish_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_publish", False)),
+                fields=["publish_at"],
+                name="post_scheduled_idx",
+            ),
+        ),
+    ]
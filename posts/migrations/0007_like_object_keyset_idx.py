@@ -0,0 +1,19 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0006_post_publish_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["content_type", "object_id", "-id"],
+                name="like_object_keyset_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0007_like_object_keyset_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="image_variants",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
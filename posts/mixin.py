@@ -1,35 +1,171 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from redis import RedisError
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+import metrics
+from pagination import KeysetPagination
+from posts import cache as response_cache
 from posts import services
+from renderers import NDJSONRenderer
 from user.serializers import UserListSerializer
 
+FANS_STREAM_CHUNK_SIZE = 2000
+
 
 class LikedMixin:
-    @action(detail=True, methods=["POST"])
+    # Set to "like" by the `like` and `unlike` actions.
+    throttle_scope = None
+
+    @action(
+        detail=True,
+        methods=["POST"],
+        permission_classes=[IsAuthenticated],
+        throttle_scope="like",
+    )
     def like(self, request, **kwargs):
         """
-        liked `obj`.
+        liked `obj`. Returns the new number of likes.
         """
         obj = self.get_object()
         services.add_like(obj, request.user)
-        return Response()
+        total_likes = services.get_liked_set(request).like_count(obj)
+        return Response({"is_fan": True, "total_likes": total_likes})
 
-    @action(detail=True, methods=["POST"])
+    @action(
+        detail=True,
+        methods=["POST"],
+        permission_classes=[IsAuthenticated],
+        throttle_scope="like",
+    )
     def unlike(self, request, **kwargs):
         """
-        Removes like from `obj`.
+        Removes like from `obj`. Returns the new number of likes.
         """
         obj = self.get_object()
         services.remove_like(obj, request.user)
-        return Response()
+        total_likes = services.get_liked_set(request).like_count(obj)
+        return Response({"is_fan": False, "total_likes": total_likes})
 
-    @action(detail=True, methods=["GET"])
+    @action(
+        detail=True,
+        methods=["GET"],
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            NDJSONRenderer,
+        ],
+    )
     def fans(self, request, **kwargs):
         """
-        Gets all users who liked `obj`
+        Gets users who liked `obj`, most recent likes first, a page at a
+        time. With `?format=ndjson` streams all of them instead, one per
+        line.
         """
         obj = self.get_object()
-        fans = services.get_fans(obj)
-        serializer = UserListSerializer(fans, many=True)
-        return Response(serializer.data)
+        likes = services.get_fan_likes(obj)
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            return self.stream_fans(likes)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(likes, request, view=self)
+        serializer = UserListSerializer(
+            [like.user for like in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def stream_fans(self, likes) -> StreamingHttpResponse:
+        """
+        Streams fans from a server-side cursor, so memory stays bounded by
+        `FANS_STREAM_CHUNK_SIZE` rows whatever the number of likes.
+        """
+        rows = (
+            likes.order_by("-id")
+            .only(
+                "user__id",
+                "user__email",
+                "user__first_name",
+                "user__last_name",
+            )
+            .iterator(chunk_size=FANS_STREAM_CHUNK_SIZE)
+        )
+        lines = (
+            NDJSONRenderer.render_line(UserListSerializer(like.user).data)
+            for like in rows
+        )
+        return StreamingHttpResponse(
+            lines, content_type=NDJSONRenderer.media_type
+        )
+
+
+class AnonymousCacheMixin:
+    """
+    Serves `list` and `retrieve` to anonymous users from the response
+    cache, for URL names listed in `settings.RESPONSE_CACHE_TTLS`.
+    """
+
+    def get_cache_tags(self) -> list:
+        """
+        Tags the response depends on, known before it is built.
+        """
+        return []
+
+    def get_data_cache_tags(self, data) -> list:
+        """
+        Tags of the objects found in the response `data`.
+        """
+        return []
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        view_name = request.resolver_match.view_name
+        ttl = response_cache.get_ttl(view_name)
+        if (
+            ttl is None
+            or request.user.is_authenticated
+            or request.accepted_renderer.format != "json"
+        ):
+            return handler(request, *args, **kwargs)
+
+        response = None
+
+        def build():
+            nonlocal response
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return None, ()
+            renderer = request.accepted_renderer
+            content = renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            entry = {"content": content, "content_type": renderer.media_type}
+            return entry, self.get_data_cache_tags(response.data)
+
+        try:
+            entry, is_hit = response_cache.get_or_build(
+                response_cache.make_key(view_name, request),
+                ttl,
+                self.get_cache_tags(),
+                build,
+            )
+        except RedisError:
+            metrics.CACHE_REQUESTS.labels("responses", "error").inc()
+            return response or handler(request, *args, **kwargs)
+        metrics.CACHE_REQUESTS.labels(
+            "responses", "hit" if is_hit else "miss"
+        ).inc()
+        if response is None:
+            response = HttpResponse(
+                entry["content"], content_type=entry["content_type"]
+            )
+        response["X-Cache"] = "HIT" if is_hit else "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -6,12 +6,17 @@ from django.contrib.contenttypes.fields import (
     GenericRelation,
 )
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 
 from social_media_api import settings
 from user.models import UserProfile
 
+# Text search configuration used by the `search_vector` trigger and queries.
+SEARCH_CONFIG = "english"
+
 
 class Like(models.Model):
     user = models.ForeignKey(
@@ -23,6 +28,24 @@ class Like(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey("content_type", "object_id")
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "user"],
+                name="unique_like",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "content_type", "object_id"],
+                name="like_user_object_idx",
+            ),
+            models.Index(
+                fields=["content_type", "object_id", "-id"],
+                name="like_object_keyset_idx",
+            ),
+        ]
+
 
 def movie_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
@@ -41,11 +64,36 @@ class Post(models.Model):
     content = models.TextField()
     date_created = models.DateTimeField(auto_now_add=True)
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    # Thumbnail paths of `image`, filled in by `process_post_image`.
+    image_variants = models.JSONField(default=dict, editable=False)
     likes = GenericRelation(Like, default=0)
     is_publish = models.BooleanField(default=True)
+    # Drafts with `publish_at` go live once it passes, see `schedule_post`.
+    publish_at = models.DateTimeField(null=True, blank=True)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Weighted title + content, kept current by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["-date_created"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+            models.Index(
+                fields=["-date_created", "-id"],
+                name="post_published_keyset_idx",
+                condition=models.Q(is_publish=True),
+            ),
+            models.Index(
+                fields=["author", "-date_created", "-id"],
+                name="post_author_keyset_idx",
+            ),
+            models.Index(
+                fields=["publish_at"],
+                name="post_scheduled_idx",
+                condition=models.Q(is_publish=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Post id = {self.id}, author = {self.author}"
@@ -69,9 +117,16 @@ class Comments(models.Model):
     content = models.TextField(max_length=500)
     created_at = models.DateTimeField(auto_now_add=True)
     likes = GenericRelation(Like, default=0)
+    like_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="comment_post_keyset_idx",
+            ),
+        ]
 
     def total_likes(self) -> int:
         return self.likes.count()
@@ -1,40 +1,103 @@
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 
+from images import ImageVariantsField
+from metrics import TimedListSerializer, TimedModelSerializer
+from posts import like_buffer
 from posts import services as likes_services
 from posts.models import Comments, Post
 
 User = get_user_model()
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class LikedListSerializer(TimedListSerializer):
+    """
+    Loads the likes of `request.user` for the whole list at once, so that
+    `is_fan` costs no query per item.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        request = self.context.get("request")
+        if request is not None:
+            likes_services.get_liked_set(request).load(
+                obj for obj in data if not hasattr(obj, "is_fan")
+            )
+        return super().to_representation(data)
+
+
+class LikedSerializer(TimedModelSerializer):
+    """
+    Base serializer of likeable models. Adds `is_fan`.
+    """
+
+    is_fan = serializers.SerializerMethodField()
+
+    def get_is_fan(self, obj) -> bool:
+        """
+        Checks if `request.user` liked `obj`. Uses the `is_fan` annotation
+        when the queryset has one.
+        """
+        if hasattr(obj, "is_fan"):
+            return obj.is_fan
+        request = self.context.get("request")
+        if request is None:
+            return False
+        return likes_services.get_liked_set(request).is_fan(obj)
+
+    def to_representation(self, instance):
+        """
+        Adds the unflushed likes to `total_likes` while the like buffer
+        is on.
+        """
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        if (
+            "total_likes" in data
+            and request is not None
+            and like_buffer.is_enabled()
+        ):
+            data["total_likes"] = likes_services.get_liked_set(
+                request
+            ).like_count(instance)
+        return data
+
+
+class CommentSerializer(LikedSerializer):
     """
     Comment Serializer
     """
 
     author = serializers.CharField(source="author.username", read_only=True)
     post = serializers.CharField(source="post.title", read_only=True)
+    total_likes = serializers.IntegerField(source="like_count", read_only=True)
 
     class Meta:
         model = Comments
+        list_serializer_class = LikedListSerializer
         fields = [
             "id",
             "content",
             "created_at",
             "post",
             "author",
+            "is_fan",
             "total_likes",
         ]
         read_only_fields = ["date_created", "id"]
 
 
-class CommentDetailSerializer(serializers.ModelSerializer):
+class CommentDetailSerializer(LikedSerializer):
     author = serializers.CharField(source="author.username", read_only=True)
     post = serializers.CharField(source="post.title", read_only=True)
-    is_fan = serializers.SerializerMethodField()
+    total_likes = serializers.IntegerField(source="like_count", read_only=True)
 
     class Meta:
         model = Comments
+        list_serializer_class = LikedListSerializer
         fields = [
             "id",
             "content",
@@ -46,33 +109,31 @@ class CommentDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["date_created", "id"]
 
-    def get_is_fan(self, obj) -> bool:
-        """
-        Checks if `request.user` liked the comments (`obj`).
-        """
-        user = self.context.get("request").user
-        return likes_services.is_fan(obj, user)
-
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(LikedSerializer):
     """
     Serializer that provides an overview of the Post model. This serializer
     summarises the comments and author models.
     """
 
     comments = serializers.IntegerField(
-        source="get_comments_count", read_only=True
+        source="comment_count", read_only=True
     )
     author = serializers.CharField(source="author.username", read_only=True)
+    total_likes = serializers.IntegerField(source="like_count", read_only=True)
+    images = ImageVariantsField(source="image_variants")
 
     class Meta:
         model = Post
+        list_serializer_class = LikedListSerializer
         fields = [
             "id",
             "title",
             "author",
+            "images",
             "comments",
             "date_created",
+            "is_fan",
             "total_likes",
         ]
         read_only_fields = [
@@ -83,26 +144,30 @@ class PostListSerializer(serializers.ModelSerializer):
         ]
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(LikedSerializer):
     comments = serializers.IntegerField(
-        source="get_comments_count", read_only=True
+        source="comment_count", read_only=True
     )
     author = serializers.CharField(source="author.username", read_only=True)
-    is_fan = serializers.SerializerMethodField()
+    total_likes = serializers.IntegerField(source="like_count", read_only=True)
+    images = ImageVariantsField(source="image_variants")
 
     class Meta:
         model = Post
+        list_serializer_class = LikedListSerializer
         fields = [
             "id",
             "title",
             "content",
             "author",
             "image",
+            "images",
             "comments",
             "date_created",
             "is_fan",
             "total_likes",
             "is_publish",
+            "publish_at",
         ]
         read_only_fields = [
             "id",
@@ -111,10 +176,21 @@ class PostDetailSerializer(serializers.ModelSerializer):
             "total_likes",
         ]
 
-    def get_is_fan(self, obj) -> bool:
+    def validate_publish_at(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError(
+                "Publication time must be in the future."
+            )
+        return value
+
+    def validate(self, attrs):
         """
-        Checks if `request.user` liked the post (`obj`).
+        A post with `publish_at` stays a draft until that time.
         """
-        user = self.context.get("request").user
-        likes_users = obj.likes.values_list("user_id", flat=True)
-        return user.id in likes_users
+        if attrs.get("publish_at") is not None:
+            if attrs.get("is_publish"):
+                raise serializers.ValidationError(
+                    "A scheduled post can't be published right away."
+                )
+            attrs["is_publish"] = False
+        return attrs
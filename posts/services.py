@@ -1,30 +1,94 @@
-from django.contrib.auth import get_user_model
+from collections import defaultdict
+
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Value
+
+from posts import cache as response_cache
+from posts import like_buffer
+from posts.models import Comments, Like, Post
+
+ADD_LIKE_SQL = """
+    WITH changed AS (
+        INSERT INTO {like_table} (content_type_id, object_id, user_id)
+        VALUES (%(content_type)s, %(object_id)s, %(user)s)
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    )
+    UPDATE {table} SET like_count = like_count + 1
+    WHERE id = %(object_id)s AND EXISTS (SELECT 1 FROM changed)
+    RETURNING like_count
+"""
 
-from posts.models import Like
+REMOVE_LIKE_SQL = """
+    WITH changed AS (
+        DELETE FROM {like_table}
+        WHERE content_type_id = %(content_type)s
+        AND object_id = %(object_id)s
+        AND user_id = %(user)s
+        RETURNING id
+    )
+    UPDATE {table} SET like_count = like_count - 1
+    WHERE id = %(object_id)s AND EXISTS (SELECT 1 FROM changed)
+    RETURNING like_count
+"""
 
-User = get_user_model()
+PUBLISH_DUE_SQL = """
+    UPDATE {table} SET is_publish = TRUE, date_created = statement_timestamp()
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE NOT is_publish AND publish_at <= now()
+        ORDER BY publish_at
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+"""
 
 
-def add_like(obj, user):
+def _change_like(sql: str, obj, user) -> bool:
     """
-    liked 'object'
+    Runs `sql` (insert or delete of the like of `user` on `obj` together
+    with the `like_count` update) as one statement. Refreshes
+    `obj.like_count` and returns True if the like state changed.
     """
     obj_type = ContentType.objects.get_for_model(obj)
-    like, is_created = Like.objects.get_or_create(
-        content_type=obj_type, object_id=obj.id, user=user
-    )
-    return like
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(
+                like_table=Like._meta.db_table, table=obj._meta.db_table
+            ),
+            {
+                "content_type": obj_type.id,
+                "object_id": obj.pk,
+                "user": user.pk,
+            },
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return False
+    obj.like_count = row[0]
+    if isinstance(obj, Post):
+        response_cache.invalidate(response_cache.post_tag(obj.pk))
+    return True
 
 
-def remove_like(obj, user):
+def add_like(obj, user) -> bool:
     """
-    Remove like from 'object'.
+    liked 'object'. Returns False if `user` already liked it.
     """
-    obj_type = ContentType.objects.get_for_model(obj)
-    Like.objects.filter(
-        content_type=obj_type, object_id=obj.id, user=user
-    ).delete()
+    if like_buffer.is_enabled():
+        return like_buffer.set_like(obj, user, True)
+    return _change_like(ADD_LIKE_SQL, obj, user)
+
+
+def remove_like(obj, user) -> bool:
+    """
+    Remove like from 'object'. Returns False if there was no like.
+    """
+    if like_buffer.is_enabled():
+        return like_buffer.set_like(obj, user, False)
+    return _change_like(REMOVE_LIKE_SQL, obj, user)
 
 
 def is_fan(obj, user) -> bool:
@@ -34,17 +98,169 @@ def is_fan(obj, user) -> bool:
     if not user.is_authenticated:
         return False
     obj_type = ContentType.objects.get_for_model(obj)
+    if like_buffer.is_enabled():
+        _, states = like_buffer.load([(obj_type.id, obj.pk)], user)
+        if (obj_type.id, obj.pk) in states:
+            return states[obj_type.id, obj.pk]
     likes = Like.objects.filter(
         content_type=obj_type, object_id=obj.id, user=user
     )
     return likes.exists()
 
 
-def get_fans(obj):
+class LikedSet:
     """
-    Gets all users who liked `obj`
+    Remembers which objects `user` has liked. Objects are checked in
+    batches: one `IN` query per content type for everything not seen yet.
+
+    With the like buffer on, it also reads the unflushed likes of those
+    objects, one Redis round trip per batch.
     """
-    obj_type = ContentType.objects.get_for_model(obj)
-    return User.objects.filter(
-        likes__content_type=obj_type, likes__object_id=obj.id
+
+    def __init__(self, user):
+        self.user = user
+        self._liked = defaultdict(set)
+        self._checked = defaultdict(set)
+        self._deltas = {}
+
+    def load(self, objects) -> None:
+        """
+        Fetches the like state of every object in `objects` not checked yet.
+        """
+        authenticated = self.user.is_authenticated
+        buffered = like_buffer.is_enabled()
+        if not authenticated and not buffered:
+            return
+        pending = defaultdict(set)
+        for obj in objects:
+            obj_type = ContentType.objects.get_for_model(obj)
+            if obj.pk not in self._checked[obj_type.id]:
+                pending[obj_type.id].add(obj.pk)
+        if authenticated:
+            for obj_type_id, ids in pending.items():
+                self._liked[obj_type_id].update(
+                    Like.objects.filter(
+                        content_type_id=obj_type_id,
+                        object_id__in=ids,
+                        user=self.user,
+                    ).values_list("object_id", flat=True)
+                )
+        if buffered and pending:
+            deltas, states = like_buffer.load(
+                (
+                    (obj_type_id, pk)
+                    for obj_type_id, ids in pending.items()
+                    for pk in ids
+                ),
+                self.user if authenticated else None,
+            )
+            self._deltas.update(deltas)
+            for (obj_type_id, pk), liked in states.items():
+                if liked:
+                    self._liked[obj_type_id].add(pk)
+                else:
+                    self._liked[obj_type_id].discard(pk)
+        for obj_type_id, ids in pending.items():
+            self._checked[obj_type_id].update(ids)
+
+    def is_fan(self, obj) -> bool:
+        """
+        Checks if `user` has liked `obj`, loading it if it is new.
+        """
+        if not self.user.is_authenticated:
+            return False
+        self.load([obj])
+        obj_type = ContentType.objects.get_for_model(obj)
+        return obj.pk in self._liked[obj_type.id]
+
+    def like_count(self, obj) -> int:
+        """
+        Number of likes of `obj`, unflushed ones included.
+        """
+        if not like_buffer.is_enabled():
+            return obj.like_count
+        self.load([obj])
+        obj_type = ContentType.objects.get_for_model(obj)
+        return obj.like_count + self._deltas.get((obj_type.id, obj.pk), 0)
+
+
+def get_liked_set(request) -> LikedSet:
+    """
+    Returns the `LikedSet` of `request.user`, shared for the whole request.
+    """
+    liked_set = getattr(request, "_liked_set", None)
+    if liked_set is None:
+        liked_set = request._liked_set = LikedSet(request.user)
+    return liked_set
+
+
+def annotate_is_fan(queryset, user):
+    """
+    Annotates every object of `queryset` with `is_fan`: whether `user`
+    has liked it, as an `EXISTS` subquery. Left out while the like buffer
+    is on, as the database doesn't know the buffered likes.
+    """
+    if like_buffer.is_enabled():
+        return queryset
+    if not user.is_authenticated:
+        return queryset.annotate(is_fan=Value(False))
+    obj_type = ContentType.objects.get_for_model(queryset.model)
+    likes = Like.objects.filter(
+        content_type=obj_type, object_id=OuterRef("pk"), user=user
     )
+    return queryset.annotate(is_fan=Exists(likes))
+
+
+def get_fan_likes(obj):
+    """
+    Gets the likes of `obj` with the users who left them, so that fans
+    can be paged by like id.
+    """
+    obj_type = ContentType.objects.get_for_model(obj)
+    return Like.objects.filter(
+        content_type=obj_type, object_id=obj.id
+    ).select_related("user")
+
+
+def add_comment(serializer, post_id: int, author_id: int):
+    """
+    Saves a new comment of profile `author_id` on post `post_id` and bumps
+    its `comment_count`.
+    """
+    with transaction.atomic():
+        comment = serializer.save(author_id=author_id, post_id=post_id)
+        Post.objects.filter(pk=post_id).update(
+            comment_count=F("comment_count") + 1
+        )
+    return comment
+
+
+def remove_comment(comment: Comments) -> None:
+    """
+    Deletes `comment` and decrements `comment_count` of its post.
+    """
+    with transaction.atomic():
+        comment.delete()
+        Post.objects.filter(pk=comment.post_id).update(
+            comment_count=F("comment_count") - 1
+        )
+
+
+def publish_due_posts(batch_size: int) -> list:
+    """
+    Publishes up to `batch_size` drafts whose `publish_at` has passed, in
+    one statement. Their `date_created` becomes the time they are actually
+    published, so they are listed as new without going behind posts (and
+    cursors) already handed out. Returns the ids of the published posts.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            PUBLISH_DUE_SQL.format(table=Post._meta.db_table),
+            {"batch_size": batch_size},
+        )
+        post_ids = [row[0] for row in cursor.fetchall()]
+    if post_ids:
+        response_cache.invalidate(
+            "posts", *(response_cache.post_tag(pk) for pk in post_ids)
+        )
+    return post_ids
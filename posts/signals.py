@@ -0,0 +1,22 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts import cache as response_cache
+from posts.models import Comments, Like, Post
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    response_cache.invalidate("posts", response_cache.post_tag(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Comments)
+def invalidate_commented_post(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.post_tag(instance.post_id))
+
+
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_liked_post(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Post).id:
+        response_cache.invalidate(response_cache.post_tag(instance.object_id))
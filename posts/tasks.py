@@ -1,11 +1,65 @@
 from celery import shared_task
+from django.db import transaction
 
+import images
+from posts import cache as response_cache
+from posts import feed, like_buffer, services
 from posts.models import Post
 
+PUBLISH_BATCH_SIZE = 500
+LIKES_FLUSH_BATCH_SIZE = 1000
+
+
+@shared_task()
+def schedule_post(batch_size=PUBLISH_BATCH_SIZE):
+    """
+    Publishes the drafts whose `publish_at` has passed, `batch_size` at a
+    time, and fans out each of them once its batch is committed.
+    """
+    published = 0
+    while True:
+        with transaction.atomic():
+            post_ids = services.publish_due_posts(batch_size)
+            for post_id in post_ids:
+                transaction.on_commit(
+                    lambda post_id=post_id: fan_out_post.delay(post_id)
+                )
+        published += len(post_ids)
+        if len(post_ids) < batch_size:
+            return published
+
+
+@shared_task()
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id, is_publish=True).first()
+    if post is not None:
+        feed.fan_out(post)
+
+
+@shared_task()
+def rebuild_feed(profile_id):
+    feed.rebuild_inbox(profile_id)
+
+
+@shared_task()
+def flush_likes(batch_size=LIKES_FLUSH_BATCH_SIZE):
+    """
+    Writes the likes buffered in Redis to the database.
+    """
+    return like_buffer.flush(batch_size)
+
 
 @shared_task()
-def schedule_post():
-    posts = Post.objects.filter(is_publish=False)
-    for post in posts:
-        post.is_publish = True
-        post.save()
+def process_post_image(post_id, name):
+    """
+    Strips EXIF from the image `name` of post `post_id` and stores its
+    thumbnails, unless the image was replaced meanwhile.
+    """
+    post = Post.objects.filter(pk=post_id, image=name).first()
+    if post is None:
+        return
+    variants = images.process_image(post.image.storage, name)
+    Post.objects.filter(pk=post_id, image=name).update(
+        image_variants=variants
+    )
+    response_cache.invalidate(response_cache.post_tag(post_id))
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework_nested import routers
 
+from posts import async_views
 from posts.views import (
     CommentsReadOnlyViewSet,
     CommentCreateView,
     CommentUpdateView,
+    FeedView,
     PostReadOnlyViewSet,
     PostCreateView,
     PostUpdateDeleteView,
@@ -21,6 +23,7 @@ comments_router.register(
 urlpatterns = [
     path("", include(router.urls)),
     path("", include(comments_router.urls)),
+    path("feed/", FeedView.as_view(), name="feed"),
     path("post/create/", PostCreateView.as_view(), name="post-create"),
     path(
         "posts/<int:pk>/update/",
@@ -37,6 +40,17 @@ urlpatterns = [
         CommentUpdateView.as_view(),
         name="comment-update",
     ),
+    path("async/posts/", async_views.post_list, name="async-post-list"),
+    path(
+        "async/posts/<int:pk>/",
+        async_views.post_detail,
+        name="async-post-detail",
+    ),
+    path(
+        "async/posts/<int:post_pk>/comments/",
+        async_views.comment_list,
+        name="async-comment-list",
+    ),
 ]
 
 app_name = "posts"
@@ -1,59 +1,107 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import permissions
 from rest_framework import viewsets, generics
-
-from pagination import ListPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+import images
+from pagination import (
+    CommentPagination,
+    PostPagination,
+    SearchPaginationMixin,
+)
 from permissions import IsAuthorOrReadOnly
-from posts.mixin import LikedMixin
-from posts.models import Comments, Post
+from posts import cache as response_cache
+from posts import feed, services
+from posts.mixin import AnonymousCacheMixin, LikedMixin
+from posts.models import SEARCH_CONFIG, Comments, Post
 from posts.serializers import (
     CommentSerializer,
     PostDetailSerializer,
     PostListSerializer,
     CommentDetailSerializer,
 )
-from user.models import UserProfile
+from posts.tasks import fan_out_post, process_post_image
+from user.authentication import get_profile_id, get_request_profile_id
 
 
-class PostReadOnlyViewSet(viewsets.ReadOnlyModelViewSet, LikedMixin):
+class PostReadOnlyViewSet(
+    SearchPaginationMixin,
+    AnonymousCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+    LikedMixin,
+):
     """
     Lists all the posts . Anon users can read post.
 
     EXAMPLE:
         GET -> /posts/ -> returns all posts
         GET -> /posts/{id}/ -> return the post detail
+        GET -> /posts/batch/?ids=1,2,3 -> return the details of posts 1-3
     """
 
-    queryset = (
-        Post.objects.filter(is_publish=True)
-        .select_related("author")
-        .prefetch_related("comments", "likes", "likes__user")
-    )
+    queryset = Post.objects.filter(is_publish=True).select_related("author")
 
     serializer_class = PostListSerializer
     permission_classes = (permissions.AllowAny,)
-    pagination_class = ListPagination
+    pagination_class = PostPagination
+    batch_max_size = 100
 
     def get_serializer_class(self):
-        if self.action == "retrieve":
+        if self.action in ("retrieve", "batch"):
             return PostDetailSerializer
         return PostListSerializer
 
+    def get_cache_tags(self):
+        if self.action == "retrieve":
+            return [response_cache.post_tag(self.kwargs["pk"])]
+        return ["posts"]
+
+    def get_data_cache_tags(self, data):
+        if self.action == "retrieve":
+            return []
+        return [
+            response_cache.post_tag(post["id"]) for post in data["results"]
+        ]
+
     def get_queryset(self):
         title = self.request.query_params.get("title")
         author = self.request.query_params.get("author")
+        text = self.request.query_params.get("q")
 
-        queryset = self.queryset
+        queryset = services.annotate_is_fan(self.queryset, self.request.user)
 
         if title:
             queryset = queryset.filter(title__icontains=title)
 
         if author:
             queryset = queryset.filter(author__username__icontains=author)
-        return queryset.distinct()
+
+        if text:
+            query = SearchQuery(
+                text, config=SEARCH_CONFIG, search_type="websearch"
+            )
+            queryset = (
+                queryset.filter(search_vector=query)
+                .annotate(rank=SearchRank(F("search_vector"), query))
+                .order_by("-rank", "-date_created", "-id")
+            )
+        return queryset
 
     @extend_schema(
         parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Full-text search in title and content, "
+                "best matches first (ex. ?q=electric cars)",
+            ),
             OpenApiParameter(
                 name="title",
                 type=str,
@@ -69,6 +117,59 @@ class PostReadOnlyViewSet(viewsets.ReadOnlyModelViewSet, LikedMixin):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def get_batch_ids(self) -> list:
+        """
+        Parses `?ids=` into a list of unique post ids, in the given order.
+        """
+        values = self.request.query_params.get("ids", "").split(",")
+        try:
+            ids = [int(value) for value in values if value.strip()]
+        except ValueError:
+            ids = None
+        # Ids beyond the bigint range would make the query fail.
+        if ids is None or not all(0 < pk < 2**63 for pk in ids):
+            raise ValidationError({"ids": "Ids must be positive integers."})
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError({"ids": "At least one id is required."})
+        if len(ids) > self.batch_max_size:
+            raise ValidationError(
+                {"ids": f"At most {self.batch_max_size} ids are allowed."}
+            )
+        return ids
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type=str,
+                required=True,
+                description="Comma-separated post ids, at most "
+                f"{batch_max_size} (ex. ?ids=1,2,3)",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["GET"])
+    def batch(self, request):
+        """
+        Details of the posts in `?ids=`, in the same order, in one query.
+        Ids of missing or unpublished posts are listed in `missing`.
+        """
+        ids = self.get_batch_ids()
+        queryset = services.annotate_is_fan(
+            self.queryset.filter(pk__in=ids), request.user
+        )
+        posts = {post.id: post for post in queryset}
+        serializer = self.get_serializer(
+            [posts[pk] for pk in ids if pk in posts], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in posts],
+            }
+        )
+
 
 class PostCreateView(generics.CreateAPIView):
     """
@@ -82,11 +183,74 @@ class PostCreateView(generics.CreateAPIView):
     queryset = Post.objects.select_related("author")
     serializer_class = PostDetailSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = "post_create"
 
     def perform_create(self, serializer):
-        return serializer.save(
-            author=UserProfile.objects.get(user=self.request.user)
+        post = serializer.save(
+            author_id=get_request_profile_id(self.request)
         )
+        if post.is_publish:
+            transaction.on_commit(lambda: fan_out_post.delay(post.id))
+        images.schedule(process_post_image, post, "image")
+        return post
+
+
+class FeedView(generics.GenericAPIView):
+    """
+    Home timeline of the current user: newest published posts of the
+    profiles they follow and their own. Follow the `next` link for
+    older posts.
+
+    EXAMPLE:
+        GET -> /feed/ -> first page of the feed
+        GET -> /feed/?before=<cursor> -> next page of the feed
+    """
+
+    serializer_class = PostListSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = PostPagination
+    # The inboxes may list posts that haven't reached the replicas yet.
+    use_primary_db = True
+
+    def get_before(self):
+        """
+        Parses the `<score>:<post id>` cursor. A bare score, as in the
+        links of older clients, skips the rest of the posts of that score.
+        """
+        before = self.request.query_params.get("before")
+        if before is None:
+            return None
+        score, _, post_id = before.partition(":")
+        try:
+            return float(score), int(post_id) if post_id else None
+        except ValueError:
+            raise ValidationError({"before": "Invalid cursor."})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="before",
+                type=str,
+                description="Cursor from the `next` link of the previous page",
+            ),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        profile_id = get_profile_id(request.user)
+        if profile_id is None:
+            raise NotFound()
+        page_size = self.paginator.get_page_size(request)
+        posts, next_before = feed.get_feed(
+            profile_id, page_size, self.get_before()
+        )
+        next_url = None
+        if next_before is not None:
+            score, post_id = next_before
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "before", f"{score!r}:{post_id}"
+            )
+        serializer = self.get_serializer(posts, many=True)
+        return Response({"next": next_url, "results": serializer.data})
 
 
 class PostUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
@@ -105,9 +269,18 @@ class PostUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PostDetailSerializer
     permission_classes = [IsAuthorOrReadOnly | permissions.IsAdminUser]
 
+    def perform_update(self, serializer):
+        if "image" not in serializer.validated_data:
+            serializer.save()
+            return
+        old_variants = serializer.instance.image_variants
+        post = serializer.save(image_variants={})
+        images.delete_variants(post.image.storage, old_variants)
+        images.schedule(process_post_image, post, "image")
+
     def perform_create(self, serializer):
         return serializer.save(
-            author=UserProfile.objects.get(user=self.request.user)
+            author_id=get_request_profile_id(self.request)
         )
 
 
@@ -129,14 +302,12 @@ class CommentsReadOnlyViewSet(viewsets.ReadOnlyModelViewSet, LikedMixin):
 
     serializer_class = CommentSerializer
     permission_classes = (permissions.AllowAny,)
-    pagination_class = ListPagination
+    pagination_class = CommentPagination
 
     def get_queryset(self):
-        queryset = (
-            Comments.objects.filter(post__id=self.kwargs["post_pk"])
-            .select_related("post", "author")
-            .prefetch_related("likes")
-        )
+        queryset = Comments.objects.filter(
+            post__id=self.kwargs["post_pk"]
+        ).select_related("post", "author")
 
         author = self.request.query_params.get("author")
         if author:
@@ -172,8 +343,10 @@ class CommentCreateView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         post = Post.objects.get(id=self.kwargs["post_pk"])
-        return serializer.save(
-            author=UserProfile.objects.get(user=self.request.user), post=post
+        return services.add_comment(
+            serializer,
+            post.id,
+            author_id=get_request_profile_id(self.request),
         )
 
 
@@ -198,12 +371,13 @@ class CommentUpdateView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthorOrReadOnly | permissions.IsAdminUser,)
 
     def get_queryset(self):
-        return (
-            Comments.objects.filter(post__id=self.kwargs["post_pk"])
-            .select_related("post", "author")
-            .prefetch_related("likes", "likes__user")
-        )
+        return Comments.objects.filter(
+            post__id=self.kwargs["post_pk"]
+        ).select_related("post", "author")
 
     def perform_create(self, serializer):
         post = Post.objects.get(id=self.kwargs["post_pk"])
         return serializer.save(author=self.request.user, post=post)
+
+    def perform_destroy(self, instance):
+        services.remove_comment(instance)
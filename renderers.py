@@ -0,0 +1,28 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON: one object per line. Lists are written item by
+    item, anything else (e.g. an error) as a single line.
+
+    Large exports don't go through `render()`: the view streams
+    `render_line()` of each row instead.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"  # noqa: VNE003
+    charset = "utf-8"
+
+    @staticmethod
+    def render_line(item) -> str:
+        return json.dumps(item, cls=DjangoJSONEncoder) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(self.render_line(item) for item in items).encode()
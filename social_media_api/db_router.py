@@ -0,0 +1,220 @@
+"""
+Routing of reads to the replicas of `settings.DATABASE_REPLICAS`.
+
+`ReplicaRoutingMiddleware` lets the reads of a request go to a replica
+when the request can't write: a safe method, a view that doesn't opt out
+with `use_primary_db` and a client that hasn't written in the last
+`REPLICA_STICKY_SECONDS`. Recent writes are remembered by the
+`PRIMARY_COOKIE` and, for the clients that don't keep cookies, by a Redis
+key per user, found from the JWT of the request. Everything else, Celery
+tasks and commands included, reads from `default`.
+
+The decision is kept in a context variable, so that it is per request
+under both WSGI threads and ASGI tasks.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from redis import RedisError
+
+from social_media_api import redis_client
+
+PRIMARY_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def primary_key(user_id) -> str:
+    return f"primary:{user_id}"
+
+
+def token_user_id(request):
+    """
+    Id of the user of the JWT of `request`, read without a query. None
+    when there is no valid token.
+    """
+    # Imported here: the router is loaded before the apps are ready.
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.settings import api_settings
+
+    from user.authentication import CachedJWTAuthentication
+
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+        return token[api_settings.USER_ID_CLAIM]
+    except (AuthenticationFailed, KeyError):
+        return None
+
+
+def mark_user_wrote(user_id) -> None:
+    try:
+        redis_client.get_redis().set(
+            primary_key(user_id), 1, ex=settings.REPLICA_STICKY_SECONDS
+        )
+    except RedisError:
+        pass
+
+
+def user_wrote_recently(user_id) -> bool:
+    """
+    Checks the key of `mark_user_wrote()`. Without Redis, reads stay on
+    `default`, which is always up to date.
+    """
+    try:
+        return bool(redis_client.get_redis().exists(primary_key(user_id)))
+    except RedisError:
+        return True
+
+
+def use_primary_db(view):
+    """
+    Makes the function view `view` always read from `default`. Class
+    views set `use_primary_db = True` instead.
+    """
+    view.use_primary_db = True
+    return view
+
+
+def view_uses_primary_db(view_func) -> bool:
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    return getattr(view_func, "use_primary_db", False) or getattr(
+        view_class, "use_primary_db", False
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not read_from_replica.get():
+            return None
+        # Reads inside a transaction must see its writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema by replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Sync or async, as the handler is; so is `process_view`.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self):
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_from_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            mark_user_wrote(user_id)
+        return self.stick(request, response)
+
+    async def __acall__(self, request):
+        token = read_from_replica.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            await sync_to_async(mark_user_wrote)(user_id)
+        return self.stick(request, response)
+
+    @staticmethod
+    def writer_id(request, response):
+        """
+        Id of the user who made the successful write `request`, or None.
+        DRF sets the user it authenticated on the Django request.
+        """
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+    @staticmethod
+    def stick(request, response):
+        """Keeps the reads of a client that wrote on `default`."""
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    @staticmethod
+    def is_sticky(request) -> bool:
+        """
+        Checks if the client wrote recently enough to read from `default`,
+        by its cookie.
+        """
+        try:
+            primary_until = float(request.COOKIES[PRIMARY_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return primary_until > time.time()
+
+    def may_read_from_replica(self, request, view_func) -> bool:
+        """All the checks but the Redis one of the user."""
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not view_uses_primary_db(view_func)
+            and not self.is_sticky(request)
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replica = self.may_read_from_replica(request, view_func)
+        if replica:
+            user_id = token_user_id(request)
+            replica = user_id is None or not user_wrote_recently(user_id)
+        read_from_replica.set(replica)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        replica = self.may_read_from_replica(request, view_func)
+        if replica:
+            user_id = token_user_id(request)
+            replica = user_id is None or not await sync_to_async(
+                user_wrote_recently
+            )(user_id)
+        read_from_replica.set(replica)
@@ -0,0 +1,14 @@
+"""
+Redis client shared by the feed inboxes, the like buffer and the rate
+limits.
+"""
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """Client of `REDIS_URL`; one connection pool per process."""
+    return redis.Redis.from_url(settings.REDIS_URL)
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "user",
     "posts",
@@ -49,8 +50,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "social_media_api.db_router.ReplicaRoutingMiddleware",
+    "throttling.RateLimitHeadersMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -58,6 +61,12 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+# Sync only, so it would put every async view behind a thread.
+if DEBUG:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("throttling.RateLimitHeadersMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
 
 ROOT_URLCONF = "social_media_api.urls"
 
@@ -92,6 +101,27 @@ DATABASES = {
     }
 }
 
+# Read replicas of `default`, as a comma-separated list of hosts. Reads of
+# safe-method requests go to them (see `social_media_api.db_router`). In
+# tests they mirror `default`.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["social_media_api.db_router.ReplicaRouter"]
+
+# After a write, the reads of the same client stay on `default` for this
+# many seconds, so that they see the write despite the replication lag.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -140,13 +170,17 @@ MEDIA_URL = "/vol/web/media/"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
-    ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "100/day"},
+    "DEFAULT_THROTTLE_CLASSES": ["throttling.RedisScopedRateThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.environ.get("THROTTLE_ANON_RATE", "50/day"),
+        "read": os.environ.get("THROTTLE_READ_RATE", "1000/hour"),
+        "write": os.environ.get("THROTTLE_WRITE_RATE", "200/hour"),
+        "like": os.environ.get("THROTTLE_LIKE_RATE", "300/hour"),
+        "follow": os.environ.get("THROTTLE_FOLLOW_RATE", "100/hour"),
+        "post_create": os.environ.get("THROTTLE_POST_CREATE_RATE", "30/hour"),
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -176,8 +210,66 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "responses",
+    },
+    "auth": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "auth",
+    },
+}
+
+# Lifetime of the cached users of `CachedJWTAuthentication`, in Redis and
+# in the memory of each process.
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_LOCAL_TTL = 5
+
+# Seconds an anonymous response stays fresh in the "responses" cache,
+# per URL name. Endpoints not listed here are never cached.
+RESPONSE_CACHE_TTLS = {
+    "posts:posts-list": 30,
+    "posts:posts-detail": 120,
+}
+
+# Home timeline: newest post ids kept per inbox, and how long an untouched
+# inbox lives before it has to be rebuilt from the database.
+FEED_INBOX_SIZE = 800
+FEED_INBOX_TTL = int(timedelta(days=7).total_seconds())
+
+# Buffer likes in Redis and let `posts.tasks.flush_likes` write them.
+LIKES_WRITE_BEHIND = os.environ.get("LIKES_WRITE_BEHIND", "") == "True"
+
+# Adds the SQL query count of every response as `X-DB-Query-Count`, for
+# `benchmark_load`. Internals: keep it off in production.
+EXPOSE_QUERY_COUNT_HEADER = (
+    os.environ.get("EXPOSE_QUERY_COUNT_HEADER", str(DEBUG)) == "True"
+)
+
+# Bearer token Prometheus scrapes `/metrics` with; staff users logged into
+# the admin may read it too. Without a token only they can.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_RESULT_BACKEND = "redis://redis:6379"
 CELERY_TIMEZONE = "Europe/Kyiv"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    "flush-likes": {
+        "task": "posts.tasks.flush_likes",
+        "schedule": 5.0,
+    },
+    "purge-expired-tokens": {
+        "task": "user.tasks.purge_expired_tokens",
+        "schedule": timedelta(hours=1),
+    },
+}
@@ -0,0 +1,166 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts import services
+from posts.models import Comments, Post
+from user.models import UserProfile
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user, username="astronaut"
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f"post {index}",
+                author=self.profile,
+                content="content",
+                is_publish=True,
+            )
+            for index in range(7)
+        ]
+        self.draft = Post.objects.create(
+            title="draft",
+            author=self.profile,
+            content="content",
+            is_publish=False,
+        )
+        services.add_like(self.posts[-1], self.user)
+        self.auth = {
+            "headers": {
+                "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+            }
+        }
+
+    async def test_post_list_pages_match_sync_view(self):
+        url = reverse("posts:async-post-list")
+        res = await self.async_client.get(url, {"page_size": 4}, **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first = res.json()
+        ids = [post["id"] for post in first["results"]]
+        self.assertEqual(ids, [post.id for post in self.posts[:-5:-1]])
+        self.assertTrue(first["results"][0]["is_fan"])
+        self.assertEqual(first["results"][0]["total_likes"], 1)
+
+        res = await self.async_client.get(first["next"], **self.auth)
+        second = res.json()
+        self.assertEqual(
+            [post["id"] for post in second["results"]],
+            [post.id for post in self.posts[2::-1]],
+        )
+        self.assertIsNone(second["next"])
+
+        sync_res = await self.async_client.get(reverse("posts:posts-list"))
+        self.assertEqual(
+            first["results"][1], sync_res.json()["results"][1]
+        )
+
+    async def test_invalid_cursor(self):
+        res = await self.async_client.get(
+            reverse("posts:async-post-list"), {"cursor": "nope"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_post_detail(self):
+        res = await self.async_client.get(
+            reverse("posts:async-post-detail", args=[self.posts[0].id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["title"], "post 0")
+        self.assertFalse(res.json()["is_fan"])
+
+        res = await self.async_client.get(
+            reverse("posts:async-post-detail", args=[self.draft.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_comment_list(self):
+        comment = await Comments.objects.acreate(
+            post=self.posts[0], author=self.profile, content="comment"
+        )
+        res = await self.async_client.get(
+            reverse("posts:async-comment-list", args=[self.posts[0].id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.json()["results"]], [comment.id]
+        )
+
+    async def test_profile_detail_requires_token(self):
+        url = reverse("user:async-userprofile-detail", args=[self.profile.id])
+        res = await self.async_client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.async_client.get(
+            url, headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.async_client.get(url, **self.auth)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["username"], "astronaut")
+
+    async def test_read_only(self):
+        res = await self.async_client.post(reverse("posts:async-post-list"))
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+# The debug toolbar is only on with DEBUG, and sync only.
+@override_settings(
+    MIDDLEWARE=[
+        path for path in settings.MIDDLEWARE if "debug_toolbar" not in path
+    ],
+    EXPOSE_QUERY_COUNT_HEADER=True,
+)
+class AsyncMiddlewareTest(TestCase):
+    def adapters(self):
+        """Mocks of the adapters Django wraps sync middleware with"""
+        return (
+            mock.patch(
+                "django.core.handlers.base.sync_to_async", wraps=sync_to_async
+            ),
+            mock.patch(
+                "django.core.handlers.base.async_to_sync", wraps=async_to_sync
+            ),
+        )
+
+    def assert_no_thread_hops(self, to_thread, to_loop):
+        """
+        Nothing was adapted but the sync `process_view` of Django's CSRF
+        middleware, the one thread hop left.
+        """
+        to_loop.assert_not_called()
+        self.assertEqual(
+            {
+                type(call.args[0].__self__).__name__
+                for call in to_thread.call_args_list
+            },
+            {"CsrfViewMiddleware"},
+        )
+
+    def test_asgi_handler_builds_async_chain(self):
+        to_sync, to_async = self.adapters()
+        with to_sync as to_thread, to_async as to_loop:
+            handler = ASGIHandler()
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+        self.assert_no_thread_hops(to_thread, to_loop)
+
+    async def test_async_view_runs_in_the_event_loop(self):
+        to_sync, to_async = self.adapters()
+        with to_sync as to_thread, to_async as to_loop:
+            res = await self.async_client.get(reverse("posts:async-post-list"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-DB-Query-Count"], "1")
+        self.assert_no_thread_hops(to_thread, to_loop)
@@ -0,0 +1,132 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import Post
+from user.authentication import CachedJWTAuthentication, aauthenticate
+from user.models import UserProfile
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "auth": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "auth-test",
+    },
+}
+
+
+def user_queries(queries) -> list:
+    """Queries loading users, not joining them to other rows"""
+    table = get_user_model()._meta.db_table
+    return [query for query in queries if f'FROM "{table}"' in query["sql"]]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user, username="astronaut"
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_warm_requests_make_no_query(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        with self.assertNumQueries(0):
+            cached = self.authenticate()
+        self.assertEqual(cached, user)
+        self.assertEqual(cached.email, self.user.email)
+        self.assertEqual(cached.profile_id, self.profile.id)
+        self.assertIn("password", cached.get_deferred_fields())
+
+        caches["default"].clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().profile_id, self.profile.id)
+
+    def test_saving_user_or_profile_invalidates(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.delete()
+        self.assertIsNone(self.authenticate().profile_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_user(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_author_checks_reuse_cached_profile(self):
+        post = Post.objects.create(
+            title="title", author=self.profile, content="content"
+        )
+        other = get_user_model().objects.create_user(
+            "other@other.com", "password"
+        )
+        UserProfile.objects.create(user=other, username="other")
+        client = APIClient()
+        url = reverse("posts:post-update", args=[post.id])
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        client.patch(url, {"title": "first"})
+        with CaptureQueriesContext(connection) as queries:
+            res = client.patch(url, {"title": "second"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(queries), [])
+
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}"
+        )
+        res = client.patch(url, {"title": "third"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_warm_async_requests_make_no_user_query(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        post = Post.objects.create(
+            title="title", author=self.profile, content="content"
+        )
+        for url in (
+            reverse("posts:async-post-list"),
+            reverse("posts:async-post-detail", args=[post.id]),
+            reverse("posts:async-comment-list", args=[post.id]),
+            reverse("user:async-userprofile-detail", args=[self.profile.id]),
+        ):
+            client.get(url)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    res = client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(user_queries(queries), [])
+
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        with self.assertNumQueries(0):
+            user = async_to_sync(aauthenticate)(request)
+        self.assertEqual(user.profile_id, self.profile.id)
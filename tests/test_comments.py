@@ -1,4 +1,5 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
 from django.test import TestCase
 
 from django.contrib.auth import get_user_model
@@ -7,7 +8,7 @@ from rest_framework import status
 
 from posts.models import Comments, Post, Like
 from posts.serializers import CommentSerializer, CommentDetailSerializer
-from user_profile.models import UserProfile
+from user.models import UserProfile
 from rest_framework.test import APIClient, APITestCase
 
 
@@ -18,7 +19,11 @@ def sample_comment(**params):
         "content": "sample content",
     }
     defaults.update(params)
-    return Comments.objects.create(**defaults)
+    comment = Comments.objects.create(**defaults)
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F("comment_count") + 1
+    )
+    return comment
 
 
 class CommentsModelTest(TestCase):
@@ -85,18 +90,18 @@ class UnauthenticatedCommentApiTest(APITestCase):
                 "posts:post-comments-list", kwargs={"post_pk": self.post.id}
             )
         )
-        comments = Comments.objects.all()
+        comments = Comments.objects.order_by("-created_at", "-id")
         serializer = CommentSerializer(comments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
         serializer1 = CommentSerializer(comment1)
         serializer2 = CommentSerializer(comment2)
         serializer3 = CommentSerializer(comment3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
 
     def test_comment_list_filter_by_author(self):
         user1 = get_user_model().objects.create_user(
@@ -126,8 +131,8 @@ class UnauthenticatedCommentApiTest(APITestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
 
     def test_get_detail_comment_auth_optional(self):
         comment = sample_comment(author=self.author, post=self.post)
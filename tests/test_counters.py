@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts import services
+from posts.models import Comments, Post
+from user.models import Follow, UserProfile
+
+
+class LikeCounterTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@email.com", password="password"
+        )
+        self.author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=self.author, content="content"
+        )
+
+    def test_add_like_increments_once(self):
+        services.add_like(self.post, self.user)
+        services.add_like(self.post, self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_remove_like_decrements(self):
+        services.add_like(self.post, self.user)
+        services.remove_like(self.post, self.user)
+        services.remove_like(self.post, self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_like_counter(self):
+        comment = Comments.objects.create(
+            author=self.author, post=self.post, content="comment"
+        )
+        services.add_like(comment, self.user)
+        comment.refresh_from_db()
+        self.assertEqual(comment.like_count, 1)
+
+    def test_rebuild_counters(self):
+        services.add_like(self.post, self.user)
+        Comments.objects.create(
+            author=self.author, post=self.post, content="comment"
+        )
+        Post.objects.update(like_count=7, comment_count=0)
+
+        call_command("rebuild_counters", batch_size=1, stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_rebuild_follow_counters(self):
+        other = UserProfile.objects.create(
+            user=get_user_model().objects.create_user(
+                email="other@email.com", password="password"
+            )
+        )
+        Follow.objects.create(follower=other, followee=self.author)
+        UserProfile.objects.update(followers_count=5, following_count=5)
+
+        call_command("rebuild_counters", batch_size=1, stdout=StringIO())
+
+        self.author.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        self.assertEqual(self.author.following_count, 0)
+        self.assertEqual(other.followers_count, 0)
+        self.assertEqual(other.following_count, 1)
+
+
+class CommentCounterApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="test title", author=self.author, content="test content"
+        )
+
+    def test_create_and_delete_comment_updates_counter(self):
+        url = reverse("posts:comment-create", args=[self.post.id])
+        res = self.client.post(url, {"content": "comment"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        url = reverse("posts:comment-update", args=[self.post.id, res.data["id"]])
+        res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_post_detail_reads_stored_counters(self):
+        Post.objects.filter(pk=self.post.pk).update(
+            like_count=3, comment_count=2
+        )
+        res = self.client.get(reverse("posts:posts-detail", args=[self.post.id]))
+        self.assertEqual(res.data["total_likes"], 3)
+        self.assertEqual(res.data["comments"], 2)
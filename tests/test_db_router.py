@@ -0,0 +1,141 @@
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from redis import ConnectionError
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import Post
+from posts.views import FeedView, PostReadOnlyViewSet
+from social_media_api.db_router import (
+    PRIMARY_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    use_primary_db,
+)
+from tests.test_like_buffer import FakeRedisMixin
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingMiddlewareTest(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+
+    def read_db(self, request, view=None, status_code=200, user=None):
+        """
+        Database the reads of `view` go to, and the response. `user` is
+        the one the view authenticates.
+        """
+        if view is None:
+            view = PostReadOnlyViewSet.as_view({"get": "list"})
+        databases = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            if user is not None:
+                request.user = user
+            databases.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse(status=status_code)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return databases[0] or DEFAULT_DB_ALIAS, response
+
+    def test_safe_requests_read_from_replica(self):
+        database, response = self.read_db(self.factory.get("/"))
+        self.assertEqual(database, "replica_0")
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_writes_read_from_primary_and_stick(self):
+        database, response = self.read_db(self.factory.post("/"))
+        self.assertEqual(database, DEFAULT_DB_ALIAS)
+        self.assertEqual(response.cookies[PRIMARY_COOKIE]["max-age"], 5)
+
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_COOKIE] = response.cookies[PRIMARY_COOKIE].value
+        self.assertEqual(self.read_db(request)[0], DEFAULT_DB_ALIAS)
+
+    def test_writes_stick_for_the_user_without_cookie(self):
+        user = get_user_model()(pk=7)
+        database, _ = self.read_db(self.factory.post("/"), user=user)
+        self.assertEqual(database, DEFAULT_DB_ALIAS)
+        self.assertEqual(self.redis.ttl("primary:7"), 5)
+
+        def read(user_id):
+            token = AccessToken.for_user(get_user_model()(pk=user_id))
+            request = self.factory.get(
+                "/", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+            return self.read_db(request)[0]
+
+        self.assertEqual(read(7), DEFAULT_DB_ALIAS)
+        self.assertEqual(read(8), "replica_0")
+
+        self.redis.delete("primary:7")
+        self.assertEqual(read(7), "replica_0")
+
+        self.redis.exists = mock.Mock(side_effect=ConnectionError)
+        self.assertEqual(read(7), DEFAULT_DB_ALIAS)
+
+    def test_invalid_token_reads_from_replica(self):
+        for authorization in ("Bearer invalid", "Bearer a b", "Bearer "):
+            with self.subTest(authorization=authorization):
+                request = self.factory.get(
+                    "/", HTTP_AUTHORIZATION=authorization
+                )
+                self.assertEqual(self.read_db(request)[0], "replica_0")
+
+    def test_stickiness_expires(self):
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.read_db(request)[0], "replica_0")
+
+    def test_failed_write_does_not_stick(self):
+        _, response = self.read_db(self.factory.post("/"), status_code=400)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_views_can_opt_out(self):
+        request = self.factory.get("/")
+        self.assertEqual(
+            self.read_db(request, FeedView.as_view())[0], DEFAULT_DB_ALIAS
+        )
+        view = use_primary_db(lambda request: HttpResponse())
+        self.assertEqual(self.read_db(request, view)[0], DEFAULT_DB_ALIAS)
+
+    def test_outside_requests_read_from_primary(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Post))
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "POSTGRES_REPLICA_HOSTS is not set")
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = "__all__"
+
+    def test_reads_go_to_replica_until_a_write(self):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        url = reverse("posts:post-comments-list", args=[1])
+        with CaptureQueriesContext(replica) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(queries)
+
+        res = self.client.post(
+            reverse("user:create"),
+            {"email": "astronaut@astronaut.com", "password": "password"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(replica) as queries:
+            self.client.get(url)
+        self.assertFalse(queries)
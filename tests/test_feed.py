@@ -0,0 +1,159 @@
+from unittest import mock
+
+import fakeredis
+import redis
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts import feed
+from posts.models import Post
+from user.models import Follow, UserProfile
+
+FEED_URL = reverse("posts:feed")
+
+
+def sample_profile(email: str) -> UserProfile:
+    user = get_user_model().objects.create_user(email, "password")
+    return UserProfile.objects.create(user=user, username=email)
+
+
+def follow(follower: UserProfile, followee: UserProfile) -> None:
+    Follow.objects.create(follower=follower, followee=followee)
+
+
+class FeedTest(APITestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch(
+            "social_media_api.redis_client.get_redis", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "posts.tasks.rebuild_feed.delay", side_effect=feed.rebuild_inbox
+        )
+        self.rebuild = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.reader = sample_profile("reader@test.com")
+        self.author = sample_profile("author@test.com")
+        self.stranger = sample_profile("stranger@test.com")
+        follow(self.reader, self.author)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def create_post(self, author: UserProfile, title: str) -> Post:
+        return Post.objects.create(title=title, author=author, content="text")
+
+    def test_cache_miss_reads_database_and_rebuilds_inbox(self):
+        post = self.create_post(self.author, "followed")
+        self.create_post(self.stranger, "not followed")
+
+        res = self.client.get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["id"] for p in res.data["results"]], [post.id])
+        self.rebuild.assert_called_once_with(self.reader.id)
+        self.assertTrue(self.redis.exists(feed.inbox_key(self.reader.id)))
+
+    def test_fan_out_only_touches_live_inboxes(self):
+        feed.rebuild_inbox(self.reader.id)
+        self.create_post(self.author, "old")
+        post = self.create_post(self.author, "new")
+
+        feed.fan_out(post)
+
+        self.assertIsNotNone(
+            self.redis.zscore(feed.inbox_key(self.reader.id), post.id)
+        )
+        self.assertFalse(self.redis.exists(feed.inbox_key(self.author.id)))
+
+        res = self.client.get(FEED_URL)
+        self.rebuild.assert_not_called()
+        self.assertEqual([p["id"] for p in res.data["results"]], [post.id])
+
+    @override_settings(FEED_INBOX_SIZE=2)
+    def test_inbox_is_capped(self):
+        feed.rebuild_inbox(self.reader.id)
+        posts = [self.create_post(self.author, str(i)) for i in range(3)]
+
+        for post in posts:
+            feed.fan_out(post)
+
+        self.assertEqual(
+            feed.read_inbox(self.reader.id, 10),
+            [(post.id, feed.post_score(post)) for post in posts[:0:-1]],
+        )
+        self.assertEqual(self.redis.zcard(feed.inbox_key(self.reader.id)), 3)
+
+    def test_next_link_pages_through_feed(self):
+        posts = [self.create_post(self.author, str(i)) for i in range(7)]
+        feed.rebuild_inbox(self.reader.id)
+
+        seen = []
+        url = FEED_URL
+        while url:
+            res = self.client.get(url)
+            seen.extend(p["id"] for p in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [post.id for post in reversed(posts)])
+
+    def read_pages(self, page_size: int) -> list:
+        seen = []
+        url = f"{FEED_URL}?page_size={page_size}"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(p["id"] for p in res.data["results"])
+            url = res.data["next"]
+        return seen
+
+    def create_tied_posts(self) -> list:
+        """
+        Posts sharing one publication time, with ids that Redis orders
+        differently as members ("99999" > "100001").
+        """
+        date_created = timezone.now()
+        posts = [
+            Post.objects.create(
+                id=post_id, title="tied", author=self.author, content="text"
+            )
+            for post_id in range(99_998, 100_002)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+            date_created=date_created
+        )
+        return [post.id for post in reversed(posts)]
+
+    def test_tied_posts_page_through_inbox(self):
+        expected = self.create_tied_posts()
+        feed.rebuild_inbox(self.reader.id)
+
+        self.assertEqual(self.read_pages(2), expected)
+        self.assertEqual(self.read_pages(3), expected)
+
+    def test_tied_posts_page_through_database(self):
+        expected = self.create_tied_posts()
+
+        with mock.patch.object(
+            feed, "read_inbox", side_effect=redis.RedisError
+        ):
+            self.assertEqual(self.read_pages(2), expected)
+            self.assertEqual(self.read_pages(3), expected)
+
+    def test_tied_posts_page_from_database_to_inbox(self):
+        expected = self.create_tied_posts()
+
+        # The first page rebuilds the inbox, the next ones read it.
+        self.assertEqual(self.read_pages(2), expected)
+        self.rebuild.assert_called_once_with(self.reader.id)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(FEED_URL, {"before": "yesterday"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,141 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts import feed
+from user import services
+from user.models import Follow, UserProfile
+
+
+def sample_profile(email: str) -> UserProfile:
+    user = get_user_model().objects.create_user(email, "password")
+    return UserProfile.objects.create(user=user, username=email)
+
+
+class FollowServicesTest(TestCase):
+    def setUp(self) -> None:
+        self.follower = sample_profile("follower@test.com")
+        self.followee = sample_profile("followee@test.com")
+
+    def test_follow_updates_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(services.follow(self.follower, self.followee))
+        self.assertFalse(services.follow(self.follower, self.followee))
+
+        self.assertEqual(self.followee.followers_count, 1)
+        self.assertEqual(self.follower.following_count, 1)
+        self.followee.refresh_from_db()
+        self.assertEqual(self.followee.followers_count, 1)
+        self.assertEqual(self.followee.following_count, 0)
+        self.assertEqual(
+            list(self.follower.following.all()), [self.followee]
+        )
+
+    def test_unfollow_updates_counts(self):
+        services.follow(self.follower, self.followee)
+        self.assertTrue(services.unfollow(self.follower, self.followee))
+        self.assertFalse(services.unfollow(self.follower, self.followee))
+
+        self.follower.refresh_from_db()
+        self.assertEqual(self.follower.following_count, 0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_self_follow_rejected(self):
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(
+                follower=self.follower, followee=self.follower
+            )
+
+
+class FollowApiTest(APITestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch(
+            "social_media_api.redis_client.get_redis", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.follower = sample_profile("follower@test.com")
+        self.followee = sample_profile("followee@test.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.follower.user)
+
+    def test_follow_returns_counts(self):
+        url = reverse("user:follower-add", args=[self.followee.id])
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {"is_following": True, "followers_count": 1, "following_count": 1},
+        )
+
+        url = reverse("user:-follower-remove", args=[self.followee.id])
+        res = self.client.post(url)
+        self.assertEqual(
+            res.data,
+            {
+                "is_following": False,
+                "followers_count": 0,
+                "following_count": 0,
+            },
+        )
+
+    def test_follow_yourself_is_bad_request(self):
+        url = reverse("user:follower-add", args=[self.follower.id])
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_follow_drops_cached_feed(self):
+        feed.rebuild_inbox(self.follower.id)
+        url = reverse("user:follower-add", args=[self.followee.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url)
+        self.assertFalse(self.redis.exists(feed.inbox_key(self.follower.id)))
+
+
+class FollowListApiTest(APITestCase):
+    def setUp(self):
+        self.profile = sample_profile("profile@test.com")
+        self.fans = [sample_profile(f"fan{i}@test.com") for i in range(7)]
+        for fan in self.fans:
+            services.follow(fan, self.profile)
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def test_followers_are_keyset_paginated(self):
+        url = reverse("user:userprofile-followers", args=[self.profile.id])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [p["id"] for p in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids += [p["id"] for p in res.data["results"]]
+
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(ids, [fan.id for fan in reversed(self.fans)])
+
+    def test_following(self):
+        url = reverse("user:userprofile-following", args=[self.fans[0].id])
+        res = self.client.get(url)
+        self.assertEqual(
+            [p["username"] for p in res.data["results"]],
+            [self.profile.username],
+        )
+
+    def test_unknown_profile(self):
+        url = reverse("user:userprofile-followers", args=[0])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profile_payload_has_only_counts(self):
+        url = reverse("user:userprofile-detail", args=[self.profile.id])
+        res = self.client.get(url)
+        self.assertNotIn("followers", res.data)
+        self.assertEqual(res.data["followers_count"], 7)
+        self.assertEqual(res.data["following_count"], 0)
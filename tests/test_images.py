@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+import images
+from posts.models import Post
+from posts.tasks import process_post_image
+from user.models import UserProfile
+
+ORIENTATION = 0x0112
+GPS_INFO = 0x8825
+
+
+def sample_exif() -> bytes:
+    """GPS data and an orientation rotating the image by 90°"""
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[GPS_INFO] = {1: "N"}
+    return exif.tobytes()
+
+
+def sample_jpeg(width=2000, height=1000) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(
+        buffer, "JPEG", exif=sample_exif()
+    )
+    return buffer.getvalue()
+
+
+def sample_frames(image_format: str) -> bytes:
+    """A two-frame image of `image_format` with EXIF data"""
+    frames = [Image.new("RGB", (200, 100), color) for color in ("red", "blue")]
+    buffer = BytesIO()
+    frames[0].save(
+        buffer,
+        image_format,
+        save_all=True,
+        append_images=frames[1:],
+        exif=sample_exif(),
+        duration=[50, 70],
+    )
+    return buffer.getvalue()
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ProcessImageTest(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save("photo.jpg", BytesIO(sample_jpeg()))
+
+    def test_exif_is_stripped_and_orientation_applied(self):
+        images.process_image(default_storage, self.name)
+
+        with default_storage.open(self.name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (1000, 2000))
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_thumbnails_in_every_size_and_format(self):
+        variants = images.process_image(default_storage, self.name)
+
+        self.assertEqual(variants.keys(), images.THUMBNAIL_SIZES.keys())
+        for size_name, size in images.THUMBNAIL_SIZES.items():
+            for extension, image_format in images.THUMBNAIL_FORMATS.items():
+                with default_storage.open(variants[size_name][extension]) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.size, (size // 2, size))
+                    self.assertNotIn(GPS_INFO, image.getexif())
+
+
+class ProcessMultiFrameImageTest(MediaRootMixin, TestCase):
+    def process(self, content: bytes) -> tuple:
+        name = default_storage.save("photo", BytesIO(content))
+        variants = images.process_image(default_storage, name)
+        return name, variants
+
+    def assert_stripped(self, image_file, size):
+        image = Image.open(image_file)
+        self.assertEqual(image.size, size)
+        self.assertEqual(dict(image.getexif()), {})
+        return image
+
+    def test_mpo_keeps_first_frame_as_jpeg(self):
+        name, variants = self.process(sample_frames("MPO"))
+
+        with default_storage.open(name) as file:
+            image = self.assert_stripped(file, (100, 200))
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(getattr(image, "n_frames", 1), 1)
+        with default_storage.open(variants["small"]["jpeg"]) as file:
+            self.assert_stripped(file, (100, 200))
+
+    def test_animated_webp_keeps_every_frame(self):
+        name, variants = self.process(sample_frames("WEBP"))
+
+        with default_storage.open(name) as file:
+            image = self.assert_stripped(file, (100, 200))
+            self.assertEqual(image.n_frames, 2)
+            image.seek(1)
+            image.load()
+            self.assertEqual(image.info["duration"], 70)
+        with default_storage.open(variants["small"]["webp"]) as file:
+            self.assert_stripped(file, (100, 200))
+
+
+class PostImageApiTest(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        UserProfile.objects.create(user=user)
+        self.client.force_authenticate(user)
+
+    def test_upload_returns_before_processing(self):
+        upload = SimpleUploadedFile(
+            "photo.jpg", sample_jpeg(), content_type="image/jpeg"
+        )
+        with mock.patch("posts.tasks.fan_out_post.delay"), mock.patch(
+            "posts.tasks.process_post_image.delay"
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("posts:post-create"),
+                {
+                    "title": "title",
+                    "content": "text",
+                    "image": upload,
+                    "is_publish": True,
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["images"], {})
+        post = Post.objects.get(id=res.data["id"])
+        delay.assert_called_once_with(post.id, post.image.name)
+
+        process_post_image(post.id, post.image.name)
+
+        res = self.client.get(reverse("posts:posts-detail", args=[post.id]))
+        self.assertTrue(
+            res.data["images"]["small"]["webp"].endswith("-small.webp")
+        )
+
+    def test_replacing_image_deletes_old_thumbnails(self):
+        post = Post.objects.create(
+            title="title",
+            author=UserProfile.objects.get(),
+            content="text",
+            image=default_storage.save(
+                "uploads/post/old.jpg", BytesIO(sample_jpeg())
+            ),
+        )
+        process_post_image(post.id, post.image.name)
+        post.refresh_from_db()
+        old_paths = [
+            path
+            for paths in post.image_variants.values()
+            for path in paths.values()
+        ]
+        self.assertTrue(all(map(default_storage.exists, old_paths)))
+
+        upload = SimpleUploadedFile(
+            "new.jpg", sample_jpeg(), content_type="image/jpeg"
+        )
+        with mock.patch(
+            "posts.tasks.process_post_image.delay"
+        ), self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                reverse("posts:post-update", args=[post.id]),
+                {"image": upload},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(map(default_storage.exists, old_paths)))
+
+    def test_replaced_image_is_not_processed(self):
+        post = Post.objects.create(
+            title="title",
+            author=UserProfile.objects.get(),
+            content="text",
+            image="uploads/post/new.jpg",
+        )
+        process_post_image(post.id, "uploads/post/old.jpg")
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, {})
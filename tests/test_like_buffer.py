@@ -0,0 +1,123 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from posts import like_buffer, services
+from posts.models import Like, Post
+from user.models import UserProfile
+
+
+class FakeRedisMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch(
+            "social_media_api.redis_client.get_redis", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(LIKES_WRITE_BEHIND=True)
+class LikeBufferTest(FakeRedisMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email="test@email.com", password="password"
+        )
+        author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=author, content="content"
+        )
+
+    def test_like_is_buffered(self):
+        self.assertTrue(services.add_like(self.post, self.user))
+        self.assertFalse(services.add_like(self.post, self.user))
+
+        self.assertFalse(Like.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertTrue(services.is_fan(self.post, self.user))
+        self.assertEqual(services.LikedSet(self.user).like_count(self.post), 1)
+
+    def test_liked_set_reads_buffer(self):
+        services.add_like(self.post, self.user)
+        liked_set = services.LikedSet(self.user)
+
+        self.assertTrue(liked_set.is_fan(self.post))
+        self.assertEqual(liked_set.like_count(self.post), 1)
+
+    def test_flush_writes_net_changes(self):
+        other = get_user_model().objects.create_user(
+            email="other@email.com", password="password"
+        )
+        services.add_like(self.post, self.user)
+        services.add_like(self.post, other)
+        services.remove_like(self.post, other)
+
+        self.assertEqual(like_buffer.flush(batch_size=10), 1)
+
+        self.assertEqual(
+            list(Like.objects.values_list("user_id", flat=True)),
+            [self.user.id],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.redis.keys("likes:*"), [])
+        self.assertEqual(services.LikedSet(self.user).like_count(self.post), 1)
+
+    def test_unlike_of_stored_like(self):
+        services.add_like(self.post, self.user)
+        like_buffer.flush(batch_size=10)
+        self.post.refresh_from_db()
+
+        self.assertTrue(services.remove_like(self.post, self.user))
+        self.assertEqual(services.LikedSet(self.user).like_count(self.post), 0)
+        like_buffer.flush(batch_size=10)
+
+        self.assertFalse(Like.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_interrupted_flush_is_retried(self):
+        services.add_like(self.post, self.user)
+        with mock.patch(
+            "posts.like_buffer._write", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            like_buffer.flush(batch_size=10)
+        self.assertTrue(services.is_fan(self.post, self.user))
+
+        like_buffer.flush(batch_size=10)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.redis.keys("likes:*"), [])
+
+
+@override_settings(LIKES_WRITE_BEHIND=True)
+class LikeBufferApiTest(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=author, content="content"
+        )
+
+    def test_buffered_like_is_visible_in_list(self):
+        url = reverse("posts:posts-like", args=[self.post.id])
+        res = self.client.post(url)
+        self.assertEqual(res.data, {"is_fan": True, "total_likes": 1})
+
+        res = self.client.get(reverse("posts:posts-list"))
+        post = res.data["results"][0]
+        self.assertTrue(post["is_fan"])
+        self.assertEqual(post["total_likes"], 1)
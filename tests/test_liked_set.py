@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from posts import services
+from posts.models import Comments, Post
+from user.models import UserProfile
+
+
+class LikedSetTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@email.com", password="password"
+        )
+        author = UserProfile.objects.create(user=self.user)
+        self.posts = [
+            Post.objects.create(title=str(i), author=author, content="text")
+            for i in range(3)
+        ]
+        self.comment = Comments.objects.create(
+            author=author, post=self.posts[0], content="comment"
+        )
+        services.add_like(self.posts[1], self.user)
+        services.add_like(self.comment, self.user)
+
+    def test_one_query_per_content_type(self):
+        liked_set = services.LikedSet(self.user)
+
+        with self.assertNumQueries(2):
+            liked_set.load(self.posts + [self.comment])
+        with self.assertNumQueries(0):
+            flags = [liked_set.is_fan(post) for post in self.posts]
+            self.assertTrue(liked_set.is_fan(self.comment))
+
+        self.assertEqual(flags, [False, True, False])
+
+
+class LikedSetApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=self.author, content="content"
+        )
+        self.url = reverse("posts:post-comments-list", args=[self.post.id])
+
+    def create_comments(self, count: int):
+        for _ in range(count):
+            comment = Comments.objects.create(
+                author=self.author, post=self.post, content="comment"
+            )
+            services.add_like(comment, self.user)
+
+    def count_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_comment_list_is_fan_without_extra_queries(self):
+        self.create_comments(1)
+        small = self.count_queries()
+        self.create_comments(4)
+        self.assertEqual(self.count_queries(), small)
+
+        res = self.client.get(self.url)
+        self.assertTrue(all(c["is_fan"] for c in res.data["results"]))
+
+    def test_post_list_exposes_is_fan(self):
+        services.add_like(self.post, self.user)
+        res = self.client.get(reverse("posts:posts-list"))
+        self.assertTrue(res.data["results"][0]["is_fan"])
@@ -0,0 +1,114 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts import services
+from posts.models import Like, Post
+from user.models import UserProfile
+
+
+class LikeServicesTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@email.com", password="password"
+        )
+        author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=author, content="content"
+        )
+
+    def test_add_like_reports_change(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(services.add_like(self.post, self.user))
+        self.assertFalse(services.add_like(self.post, self.user))
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(Like.objects.count(), 1)
+
+    def test_remove_like_reports_change(self):
+        services.add_like(self.post, self.user)
+        with self.assertNumQueries(1):
+            self.assertTrue(services.remove_like(self.post, self.user))
+        self.assertFalse(services.remove_like(self.post, self.user))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_duplicate_like_rejected(self):
+        services.add_like(self.post, self.user)
+        with self.assertRaises(IntegrityError):
+            Like.objects.create(
+                user=self.user,
+                content_type=ContentType.objects.get_for_model(Post),
+                object_id=self.post.id,
+            )
+
+
+class LikeApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=author, content="content"
+        )
+
+    def test_like_and_unlike_return_count(self):
+        url = reverse("posts:posts-like", args=[self.post.id])
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"is_fan": True, "total_likes": 1})
+
+        res = self.client.post(url)
+        self.assertEqual(res.data, {"is_fan": True, "total_likes": 1})
+
+        url = reverse("posts:posts-unlike", args=[self.post.id])
+        res = self.client.post(url)
+        self.assertEqual(res.data, {"is_fan": False, "total_likes": 0})
+
+
+class FansApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(f"fan{i}@test.com", "pass")
+            for i in range(7)
+        ]
+        author = UserProfile.objects.create(user=self.users[0])
+        self.post = Post.objects.create(
+            title="title", author=author, content="content"
+        )
+        for user in self.users:
+            services.add_like(self.post, user)
+        self.url = reverse("posts:posts-fans", args=[self.post.id])
+
+    def test_fans_are_keyset_paginated_by_like(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        emails = [fan["email"] for fan in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        emails += [fan["email"] for fan in res.data["results"]]
+
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(
+            emails, [user.email for user in reversed(self.users)]
+        )
+
+    def test_fans_ndjson_stream(self):
+        res = self.client.get(self.url, {"format": "ndjson"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["email"] for line in lines],
+            [user.email for user in reversed(self.users)],
+        )
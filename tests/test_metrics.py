@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from metrics import QUERY_COUNT_HEADER
+from posts.models import Post
+from throttling import RedisScopedRateThrottle
+from user.models import UserProfile
+
+ROUTE = "posts:posts-list"
+
+
+def sample(name, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        profile = UserProfile.objects.create(user=user, username="astronaut")
+        Post.objects.create(title="title", author=profile, content="text")
+
+    @override_settings(EXPOSE_QUERY_COUNT_HEADER=True)
+    def test_request_metrics(self):
+        requests = sample(
+            "http_request_duration_seconds_count", route=ROUTE, method="GET"
+        )
+        queries = sample(
+            "http_request_db_queries_sum", route=ROUTE, method="GET"
+        )
+        renders = sample(
+            "serializer_duration_seconds_count",
+            serializer="PostListSerializer",
+        )
+
+        with CaptureQueriesContext(connection) as captured:
+            res = self.client.get(reverse(ROUTE))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res[QUERY_COUNT_HEADER], str(len(captured)))
+        self.assertEqual(
+            sample(
+                "http_request_duration_seconds_count",
+                route=ROUTE,
+                method="GET",
+            ),
+            requests + 1,
+        )
+        self.assertEqual(
+            sample("http_request_db_queries_sum", route=ROUTE, method="GET"),
+            queries + len(captured),
+        )
+        self.assertEqual(
+            sample(
+                "serializer_duration_seconds_count",
+                serializer="PostListSerializer",
+            ),
+            renders + 1,
+        )
+
+    def test_throttled_requests_are_counted(self):
+        throttled = sample("http_requests_throttled_total", route=ROUTE)
+        with mock.patch.object(
+            RedisScopedRateThrottle, "allow_request", return_value=False
+        ), mock.patch.object(
+            RedisScopedRateThrottle, "wait", return_value=60
+        ):
+            res = self.client.get(reverse(ROUTE))
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            sample("http_requests_throttled_total", route=ROUTE),
+            throttled + 1,
+        )
+
+    @override_settings(EXPOSE_QUERY_COUNT_HEADER=False)
+    def test_query_count_header_is_opt_in(self):
+        res = self.client.get(reverse(ROUTE))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn(QUERY_COUNT_HEADER, res)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_endpoint(self):
+        self.client.get(reverse(ROUTE))
+        res = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            f'http_request_duration_seconds_count{{method="GET",'
+            f'route="{ROUTE}"}}',
+            res.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_endpoint_needs_token_or_staff(self):
+        url = reverse("metrics")
+        for authorization in ("", "Bearer wrong", "scraper", "Token scraper"):
+            with self.subTest(authorization=authorization):
+                res = self.client.get(url, HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        staff = get_user_model().objects.create_user(
+            "staff@astronaut.com", "password", is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_metrics_endpoint_without_token(self):
+        res = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
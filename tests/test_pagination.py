@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts.models import Post
+from user.models import UserProfile
+
+POST_URL = reverse("posts:posts-list")
+
+
+class KeysetPaginationApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.author = UserProfile.objects.create(user=self.user)
+        for index in range(12):
+            Post.objects.create(
+                title=f"title {index}", author=self.author, content="content"
+            )
+
+    def test_cursor_walks_every_post_once(self):
+        seen = []
+        url = POST_URL
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            seen.extend(post["id"] for post in res.data["results"])
+            url = res.data["next"]
+
+        expected = list(
+            Post.objects.order_by("-date_created", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_numbers_ignored_for_regular_users(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(POST_URL, {"page": 2})
+        self.assertNotIn("count", res.data)
+
+    def test_page_numbers_for_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(POST_URL, {"page": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 12)
+        self.assertEqual(len(res.data["results"]), 2)
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from posts import services
+from posts.models import Comments, Post
+from user.models import UserProfile
+
+POST_URL = reverse("posts:posts-list")
+
+
+class PostAnnotationApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.author = UserProfile.objects.create(user=self.user)
+
+    def create_posts(self, count: int):
+        for index in range(count):
+            post = Post.objects.create(
+                title=f"title {index}", author=self.author, content="content"
+            )
+            Comments.objects.create(
+                author=self.author, post=post, content="comment"
+            )
+            services.add_like(post, self.user)
+
+    def count_list_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(POST_URL)
+        return len(queries)
+
+    def test_post_list_query_count_does_not_grow(self):
+        self.create_posts(1)
+        small = self.count_list_queries()
+        self.create_posts(4)
+        self.assertEqual(self.count_list_queries(), small)
+
+    def test_post_detail_is_fan(self):
+        self.create_posts(1)
+        post = Post.objects.get()
+        res = self.client.get(reverse("posts:posts-detail", args=[post.id]))
+        self.assertTrue(res.data["is_fan"])
+
+        services.remove_like(post, self.user)
+        res = self.client.get(reverse("posts:posts-detail", args=[post.id]))
+        self.assertFalse(res.data["is_fan"])
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from posts import services
+from posts.models import Post
+from posts.views import PostReadOnlyViewSet
+from tests.test_like_buffer import FakeRedisMixin
+from user.models import UserProfile
+
+BATCH_URL = reverse("posts:posts-batch")
+
+
+def batch_url(ids) -> str:
+    return f"{BATCH_URL}?ids={','.join(str(pk) for pk in ids)}"
+
+
+class PostBatchTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user, username="astronaut"
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f"title {index}", author=self.profile, content="text"
+            )
+            for index in range(3)
+        ]
+        self.draft = Post.objects.create(
+            title="draft",
+            author=self.profile,
+            content="text",
+            is_publish=False,
+        )
+
+    def test_batch_keeps_order_and_reports_missing(self):
+        first, second, third = self.posts
+        ids = [third.id, self.draft.id, first.id, 10_000, third.id]
+
+        res = self.client.get(batch_url(ids))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post["id"] for post in res.data["results"]],
+            [third.id, first.id],
+        )
+        self.assertEqual(res.data["missing"], [self.draft.id, 10_000])
+        self.assertEqual(res.data["results"][0]["title"], third.title)
+        self.assertIn("total_likes", res.data["results"][0])
+        self.assertIn("comments", res.data["results"][0])
+
+    def test_batch_is_fan(self):
+        first, second, _ = self.posts
+        services.add_like(first, self.user)
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(batch_url([first.id, second.id]))
+
+        self.assertEqual(
+            [post["is_fan"] for post in res.data["results"]], [True, False]
+        )
+        self.assertEqual(res.data["results"][0]["total_likes"], 1)
+
+    @override_settings(LIKES_WRITE_BEHIND=True)
+    def test_batch_is_fan_with_buffered_likes(self):
+        first, second, _ = self.posts
+        services.add_like(second, self.user)
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(batch_url([first.id, second.id]))
+
+        self.assertEqual(
+            [post["is_fan"] for post in res.data["results"]], [False, True]
+        )
+        self.assertEqual(res.data["results"][1]["total_likes"], 1)
+
+    def test_batch_query_count_is_fixed(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(batch_url([self.posts[0].id]))
+        more = [
+            Post.objects.create(
+                title="more", author=self.profile, content="text"
+            ).id
+            for _ in range(20)
+        ]
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(batch_url(more))
+
+        self.assertEqual(len(one), 1)
+        self.assertEqual(len(many), len(one))
+
+    def test_invalid_ids(self):
+        max_size = PostReadOnlyViewSet.batch_max_size
+        for query in (
+            "",
+            "?ids=",
+            "?ids=1,a",
+            "?ids=-1",
+            f"?ids={2**63}",
+            "?ids=" + ",".join(str(pk) for pk in range(1, max_size + 2)),
+        ):
+            with self.subTest(query=query[:20]):
+                res = self.client.get(BATCH_URL + query)
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn("ids", res.data)
+
+    def test_duplicates_count_once_towards_max_size(self):
+        max_size = PostReadOnlyViewSet.batch_max_size
+        ids = [self.posts[0].id] * (max_size + 1)
+
+        res = self.client.get(batch_url(ids))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
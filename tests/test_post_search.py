@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts.models import Post
+from user.models import UserProfile
+
+POST_URL = reverse("posts:posts-list")
+
+
+class PostSearchApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.author = UserProfile.objects.create(user=user, username="bob")
+        self.in_content = Post.objects.create(
+            title="Weekend", author=self.author, content="Riding electric cars"
+        )
+        self.in_title = Post.objects.create(
+            title="Electric cars", author=self.author, content="A review"
+        )
+        Post.objects.create(
+            title="Submarine", author=self.author, content="Deep water"
+        )
+
+    def test_search_vector_follows_updates(self):
+        self.in_title.title = "Submarines"
+        self.in_title.save()
+
+        res = self.client.get(POST_URL, {"q": "submarine"})
+
+        self.assertEqual(
+            {post["id"] for post in res.data["results"]},
+            {self.in_title.id, Post.objects.get(title="Submarine").id},
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        res = self.client.get(POST_URL, {"q": "electric car"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+        self.assertEqual(
+            [post["id"] for post in res.data["results"]],
+            [self.in_title.id, self.in_content.id],
+        )
+
+    def test_search_combines_with_filters(self):
+        other = UserProfile.objects.create(
+            user=get_user_model().objects.create_user(
+                "other@astronaut.com", "password"
+            ),
+            username="alice",
+        )
+        Post.objects.create(title="Electric cars", author=other, content="")
+
+        res = self.client.get(POST_URL, {"q": "electric", "author": "ali"})
+
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(res.data["results"][0]["author"], "alice")
@@ -7,7 +7,7 @@ from rest_framework.test import APIClient, APITestCase
 
 from posts.models import Post, Like, Comments
 from posts.serializers import PostListSerializer, PostDetailSerializer
-from user_profile.models import UserProfile
+from user.models import UserProfile
 
 POST_URL = reverse("posts:posts-list")
 
@@ -88,20 +88,20 @@ class UnauthenticatedPostApiTest(APITestCase):
         post2.likes.add(like)
         post3.comments.add(comments)
 
-        posts = Post.objects.all()
+        posts = Post.objects.order_by("-date_created", "-id")
         res = self.client.get(POST_URL)
         serializer = PostListSerializer(posts, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
         serializer1 = PostListSerializer(post1)
         serializer2 = PostListSerializer(post2)
         serializer3 = PostListSerializer(post3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
 
     def test_post_list_filter_by_title(self):
         post1 = sample_post(title="starship", author=self.author)
@@ -115,9 +115,9 @@ class UnauthenticatedPostApiTest(APITestCase):
         serializer3 = PostListSerializer(post3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
 
     def test_post_list_filter_by_author(self):
         user1 = get_user_model().objects.create_user(
@@ -143,8 +143,8 @@ class UnauthenticatedPostApiTest(APITestCase):
         res = self.client.get(POST_URL, {"author": "roman"})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer1.data, res.data)
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer1.data, res.data["results"])
 
     def test_get_post_detail_auth_optional(self):
         url = detail_url(self.post.id)
@@ -0,0 +1,479 @@
+"""
+Query budgets of the API endpoints.
+
+The same requests are measured with 1, 10, 100 and 1000 rows of posts,
+comments, likes and follows around the objects they touch. Every endpoint
+must make the same number of queries at each size, and no more than its
+budget. Lists are paginated, so the first size stays below one page:
+a query per row shows up as growth from it to the full pages of the next
+sizes. A failure lists the SQL of the offending request.
+
+Deleting a profile or a user is left out: the cascade over the seeded rows
+grows with them by design.
+"""
+from collections import defaultdict, namedtuple
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from posts.models import Comments, Like, Post
+from tests.test_like_buffer import FakeRedisMixin
+from user.models import Follow, UserProfile
+
+SIZES = (1, 10, 100, 1000)
+PASSWORD = "password"
+
+LOCMEM_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"query-budget-{alias}",
+    }
+    for alias in ("default", "responses", "auth")
+}
+
+# `url` and `data` are called with the test case; `anonymous` requests
+# have no credentials, `user` picks another user than the seeded author.
+Endpoint = namedtuple(
+    "Endpoint",
+    ["name", "method", "url", "data", "anonymous", "user"],
+    defaults=[None, False, None],
+)
+
+
+def post_url(name):
+    return lambda test: reverse(name, args=[test.post.id])
+
+
+def comment_url(name):
+    return lambda test: reverse(name, args=[test.post.id, test.comment.id])
+
+
+def profile_url(name):
+    return lambda test: reverse(name, args=[test.profile.id])
+
+
+def other_profile_url(name):
+    return lambda test: reverse(name, args=[test.other_profile.id])
+
+
+ENDPOINTS = [
+    # posts
+    Endpoint(
+        "posts:posts-list", "get", lambda test: reverse("posts:posts-list")
+    ),
+    Endpoint(
+        "posts:posts-list (anonymous)",
+        "get",
+        lambda test: reverse("posts:posts-list"),
+        anonymous=True,
+    ),
+    Endpoint(
+        "posts:posts-list (search)",
+        "get",
+        lambda test: reverse("posts:posts-list") + "?q=title",
+    ),
+    Endpoint("posts:posts-detail", "get", post_url("posts:posts-detail")),
+    Endpoint(
+        "posts:posts-batch",
+        "get",
+        lambda test: reverse("posts:posts-batch")
+        + f"?ids={test.post.id},{test.new_post().id},{2**31}",
+    ),
+    Endpoint("posts:posts-like", "post", post_url("posts:posts-like")),
+    Endpoint("posts:posts-unlike", "post", post_url("posts:posts-unlike")),
+    Endpoint("posts:posts-fans", "get", post_url("posts:posts-fans")),
+    Endpoint("posts:feed", "get", lambda test: reverse("posts:feed")),
+    Endpoint(
+        "posts:post-create",
+        "post",
+        lambda test: reverse("posts:post-create"),
+        lambda test: {"title": "new", "content": "new", "is_publish": True},
+    ),
+    Endpoint("posts:post-update (get)", "get", post_url("posts:post-update")),
+    Endpoint(
+        "posts:post-update (patch)",
+        "patch",
+        post_url("posts:post-update"),
+        lambda test: {"title": "updated"},
+    ),
+    Endpoint(
+        "posts:post-update (delete)",
+        "delete",
+        lambda test: reverse("posts:post-update", args=[test.new_post().id]),
+    ),
+    Endpoint(
+        "posts:post-comments-list",
+        "get",
+        lambda test: reverse("posts:post-comments-list", args=[test.post.id]),
+    ),
+    Endpoint(
+        "posts:post-comments-detail",
+        "get",
+        comment_url("posts:post-comments-detail"),
+    ),
+    Endpoint(
+        "posts:post-comments-like",
+        "post",
+        comment_url("posts:post-comments-like"),
+    ),
+    Endpoint(
+        "posts:post-comments-unlike",
+        "post",
+        comment_url("posts:post-comments-unlike"),
+    ),
+    Endpoint(
+        "posts:post-comments-fans",
+        "get",
+        comment_url("posts:post-comments-fans"),
+    ),
+    Endpoint(
+        "posts:comment-create",
+        "post",
+        lambda test: reverse("posts:comment-create", args=[test.post.id]),
+        lambda test: {"content": "new"},
+    ),
+    Endpoint(
+        "posts:comment-update (patch)",
+        "patch",
+        comment_url("posts:comment-update"),
+        lambda test: {"content": "updated"},
+    ),
+    Endpoint(
+        "posts:comment-update (delete)",
+        "delete",
+        lambda test: reverse(
+            "posts:comment-update", args=[test.post.id, test.new_comment().id]
+        ),
+    ),
+    Endpoint(
+        "posts:async-post-list",
+        "get",
+        lambda test: reverse("posts:async-post-list"),
+    ),
+    Endpoint(
+        "posts:async-post-detail",
+        "get",
+        post_url("posts:async-post-detail"),
+    ),
+    Endpoint(
+        "posts:async-comment-list",
+        "get",
+        lambda test: reverse("posts:async-comment-list", args=[test.post.id]),
+    ),
+    # user
+    Endpoint(
+        "user:create",
+        "post",
+        lambda test: reverse("user:create"),
+        lambda test: {"email": test.new_email(), "password": PASSWORD},
+        anonymous=True,
+    ),
+    Endpoint(
+        "user:token_obtain_pair",
+        "post",
+        lambda test: reverse("user:token_obtain_pair"),
+        lambda test: {"email": test.user.email, "password": PASSWORD},
+        anonymous=True,
+    ),
+    Endpoint(
+        "user:token_refresh",
+        "post",
+        lambda test: reverse("user:token_refresh"),
+        lambda test: {"refresh": str(RefreshToken.for_user(test.user))},
+        anonymous=True,
+    ),
+    Endpoint(
+        "user:token_verify",
+        "post",
+        lambda test: reverse("user:token_verify"),
+        lambda test: {"token": str(AccessToken.for_user(test.user))},
+        anonymous=True,
+    ),
+    Endpoint(
+        "user:logout",
+        "post",
+        lambda test: reverse("user:logout"),
+        lambda test: {"all": True},
+    ),
+    Endpoint("user:manage", "get", lambda test: reverse("user:manage")),
+    Endpoint(
+        "user:manage (patch)",
+        "patch",
+        lambda test: reverse("user:manage"),
+        lambda test: {"first_name": "updated"},
+    ),
+    Endpoint("user:user-posts", "get", profile_url("user:user-posts")),
+    Endpoint(
+        "user:userprofile-list",
+        "get",
+        lambda test: reverse("user:userprofile-list"),
+    ),
+    Endpoint(
+        "user:userprofile-list (search)",
+        "get",
+        lambda test: reverse("user:userprofile-list") + "?q=seed",
+    ),
+    Endpoint(
+        "user:userprofile-autocomplete",
+        "get",
+        lambda test: reverse("user:userprofile-autocomplete")
+        + "?prefix=seed",
+    ),
+    Endpoint(
+        "user:userprofile-create",
+        "post",
+        lambda test: reverse("user:userprofile-create"),
+        lambda test: {"username": "new"},
+        user=lambda test: test.new_user(),
+    ),
+    Endpoint(
+        "user:userprofile-detail",
+        "get",
+        profile_url("user:userprofile-detail"),
+    ),
+    Endpoint(
+        "user:userprofile-update (patch)",
+        "patch",
+        profile_url("user:userprofile-update"),
+        lambda test: {"bio": "updated"},
+    ),
+    Endpoint(
+        "user:userprofile-followers",
+        "get",
+        profile_url("user:userprofile-followers"),
+    ),
+    Endpoint(
+        "user:userprofile-following",
+        "get",
+        profile_url("user:userprofile-following"),
+    ),
+    Endpoint(
+        "user:follower-add",
+        "post",
+        other_profile_url("user:follower-add"),
+    ),
+    Endpoint(
+        "user:-follower-remove",
+        "post",
+        other_profile_url("user:-follower-remove"),
+    ),
+    Endpoint(
+        "user:async-userprofile-detail",
+        "get",
+        profile_url("user:async-userprofile-detail"),
+    ),
+]
+
+
+# Queries per request, including the one loading the user of the token.
+BUDGETS = {
+    "posts:posts-list": 2,
+    "posts:posts-list (anonymous)": 1,
+    "posts:posts-list (search)": 3,
+    "posts:posts-detail": 2,
+    "posts:posts-batch": 2,
+    "posts:posts-like": 3,
+    "posts:posts-unlike": 3,
+    "posts:posts-fans": 3,
+    "posts:feed": 3,
+    "posts:post-create": 4,
+    "posts:post-update (get)": 3,
+    "posts:post-update (patch)": 4,
+    "posts:post-update (delete)": 5,
+    "posts:post-comments-list": 3,
+    "posts:post-comments-detail": 3,
+    "posts:post-comments-like": 3,
+    "posts:post-comments-unlike": 3,
+    "posts:post-comments-fans": 3,
+    "posts:comment-create": 9,
+    "posts:comment-update (patch)": 4,
+    "posts:comment-update (delete)": 7,
+    "posts:async-post-list": 2,
+    "posts:async-post-detail": 2,
+    "posts:async-comment-list": 2,
+    "user:create": 2,
+    "user:token_obtain_pair": 2,
+    "user:token_refresh": 1,
+    "user:token_verify": 1,
+    "user:logout": 2,
+    "user:manage": 1,
+    "user:manage (patch)": 2,
+    "user:user-posts": 3,
+    "user:userprofile-list": 2,
+    "user:userprofile-list (search)": 2,
+    "user:userprofile-autocomplete": 2,
+    "user:userprofile-create": 2,
+    "user:userprofile-detail": 2,
+    "user:userprofile-update (patch)": 3,
+    "user:userprofile-followers": 3,
+    "user:userprofile-following": 3,
+    "user:follower-add": 4,
+    "user:-follower-remove": 4,
+    "user:async-userprofile-detail": 2,
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryBudgetTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Celery tasks run outside of the request.
+        for task in ("rebuild_feed", "fan_out_post"):
+            patcher = mock.patch(f"posts.tasks.{task}.delay")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(
+            "author@example.com", PASSWORD
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user, username="author"
+        )
+        other = get_user_model().objects.create_user(
+            "other@example.com", PASSWORD
+        )
+        self.other_profile = UserProfile.objects.create(
+            user=other, username="other"
+        )
+        self.post = Post.objects.create(
+            title="title", author=self.profile, content="content"
+        )
+        self.comment = self.new_comment()
+        self.seeded = 0
+        self.created = 0
+
+    def new_email(self) -> str:
+        self.created += 1
+        return f"new-{self.created}@example.com"
+
+    def new_user(self):
+        return get_user_model().objects.create_user(self.new_email(), "!")
+
+    def new_post(self) -> Post:
+        return Post.objects.create(
+            title="title", author=self.profile, content="content"
+        )
+
+    def new_comment(self) -> Comments:
+        Post.objects.filter(pk=self.post.pk).update(
+            comment_count=F("comment_count") + 1
+        )
+        return Comments.objects.create(
+            post=self.post, author=self.profile, content="comment"
+        )
+
+    def seed(self, size: int) -> None:
+        """
+        Adds rows until there are `size` other profiles, each with a post,
+        a comment and a like on the post and comment of the author, and
+        following the author both ways.
+        """
+        count = size - self.seeded
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"seed-{index}@example.com", password="!")
+            for index in range(self.seeded, size)
+        )
+        profiles = UserProfile.objects.bulk_create(
+            UserProfile(user=user, username=f"seed {user.email}")
+            for user in users
+        )
+        Post.objects.bulk_create(
+            Post(title=f"title {index}", author=profile, content="content")
+            for index, profile in enumerate(profiles)
+        )
+        Comments.objects.bulk_create(
+            Comments(post=self.post, author=profile, content="comment")
+            for profile in profiles
+        )
+        for obj in (self.post, self.comment):
+            Like.objects.bulk_create(
+                Like(
+                    user=user,
+                    content_type=ContentType.objects.get_for_model(obj),
+                    object_id=obj.id,
+                )
+                for user in users
+            )
+        Post.objects.filter(pk=self.post.pk).update(
+            like_count=F("like_count") + count,
+            comment_count=F("comment_count") + count,
+        )
+        Comments.objects.filter(pk=self.comment.pk).update(
+            like_count=F("like_count") + count
+        )
+        Follow.objects.bulk_create(
+            follow
+            for profile in profiles
+            for follow in (
+                Follow(follower=profile, followee=self.profile),
+                Follow(follower=self.profile, followee=profile),
+            )
+        )
+        UserProfile.objects.filter(pk=self.profile.pk).update(
+            followers_count=F("followers_count") + count,
+            following_count=F("following_count") + count,
+        )
+        UserProfile.objects.filter(pk__in=[p.pk for p in profiles]).update(
+            followers_count=1, following_count=1
+        )
+        self.seeded = size
+
+    def request(self, endpoint: Endpoint):
+        """
+        Makes the request of `endpoint` from clean caches and returns the
+        SQL of its queries.
+        """
+        url = endpoint.url(self)
+        data = endpoint.data(self) if endpoint.data else None
+        client = APIClient()
+        if not endpoint.anonymous:
+            # A token, so that every request loads its user the real way.
+            user = endpoint.user(self) if endpoint.user else self.user
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+            )
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        self.redis.flushall()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, endpoint.method)(url, data)
+        self.assertLess(
+            response.status_code,
+            400,
+            f"{endpoint.name}: {response.status_code} {response.content!r}",
+        )
+        return [query["sql"] for query in queries.captured_queries]
+
+    def test_query_counts_stay_constant(self):
+        measured = defaultdict(list)
+        for size in SIZES:
+            self.seed(size)
+            for endpoint in ENDPOINTS:
+                measured[endpoint.name].append((size, self.request(endpoint)))
+
+        for endpoint in ENDPOINTS:
+            with self.subTest(endpoint=endpoint.name):
+                _, baseline = measured[endpoint.name][0]
+                for size, queries in measured[endpoint.name]:
+                    report = "\n".join(queries)
+                    self.assertLessEqual(
+                        len(queries),
+                        BUDGETS[endpoint.name],
+                        f"{len(queries)} queries with {size} rows, "
+                        f"budget {BUDGETS[endpoint.name]}:\n{report}",
+                    )
+                    self.assertEqual(
+                        len(queries),
+                        len(baseline),
+                        f"{len(queries)} queries with {size} rows, "
+                        f"{len(baseline)} with {SIZES[0]}:\n{report}",
+                    )
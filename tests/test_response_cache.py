@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from posts import cache as response_cache
+from posts import services
+from posts.models import Post
+from user.models import UserProfile
+
+POST_URL = reverse("posts:posts-list")
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses-test",
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.author = UserProfile.objects.create(user=self.user)
+        self.post = Post.objects.create(
+            title="title", author=self.author, content="content"
+        )
+        self.detail_url = reverse("posts:posts-detail", args=[self.post.id])
+
+    def test_anonymous_list_is_served_from_cache(self):
+        res = self.client.get(POST_URL, {"title": "t"})
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            res = self.client.get(POST_URL, {"title": "t"})
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(res.json()["results"][0]["id"], self.post.id)
+
+    def test_authenticated_requests_are_not_cached(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(POST_URL)
+        self.assertNotIn("X-Cache", res)
+
+    def test_like_invalidates_list_and_detail(self):
+        self.client.get(POST_URL)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.add_like(self.post, self.user)
+
+        res = self.client.get(POST_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.json()["results"][0]["total_likes"], 1)
+        res = self.client.get(self.detail_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.json()["total_likes"], 1)
+
+    def test_new_post_invalidates_list_only(self):
+        self.client.get(POST_URL)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title="new", author=self.author, content="")
+
+        self.assertEqual(self.client.get(POST_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.detail_url)["X-Cache"], "HIT")
+
+    def test_expired_page_is_served_while_another_worker_rebuilds(self):
+        self.client.get(self.detail_url)
+        cache = response_cache.get_cache()
+        request = Request(APIRequestFactory().get(self.detail_url))
+        key = response_cache.make_key("posts:posts-detail", request)
+        entry = cache.get(key)
+        entry["expires_at"] = 0
+        cache.set(key, entry)
+        cache.add(f"lock:{key}", 1)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(self.detail_url)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_page_is_not_stored_if_a_post_changed_while_built(self):
+        cache = response_cache.get_cache()
+        tag = response_cache.post_tag(self.post.id)
+        response_cache.get_tag_versions([tag])
+
+        def build():
+            # A like committed after the page read its posts.
+            with self.captureOnCommitCallbacks(execute=True):
+                response_cache.invalidate(tag)
+            return {"data": "old"}, [tag]
+
+        entry, is_hit = response_cache.get_or_build("page", 30, [], build)
+        self.assertEqual((entry["data"], is_hit), ("old", False))
+        self.assertIsNone(cache.get("page"))
+
+        response_cache.get_or_build(
+            "page", 30, [], lambda: ({"data": "new"}, [tag])
+        )
+        self.assertEqual(cache.get("page")["data"], "new")
+
+    def test_pages_are_stored_after_the_clock_is_lost(self):
+        cache = response_cache.get_cache()
+        tag = response_cache.post_tag(self.post.id)
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                response_cache.invalidate(tag)
+        cache.delete(response_cache.CLOCK_KEY)
+
+        response_cache.get_or_build(
+            "page", 30, [], lambda: ({"data": "page"}, [tag])
+        )
+        self.assertEqual(cache.get("page")["data"], "page")
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts.models import Post
+from posts.tasks import schedule_post
+from user.models import UserProfile
+
+
+class SchedulePostTaskTest(TestCase):
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="test@email.com", password="password"
+        )
+        self.author = UserProfile.objects.create(user=user)
+        patcher = mock.patch("posts.tasks.fan_out_post.delay")
+        self.fan_out = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_draft(self, title: str, publish_at=None) -> Post:
+        return Post.objects.create(
+            title=title,
+            author=self.author,
+            content="text",
+            is_publish=False,
+            publish_at=publish_at,
+        )
+
+    def test_publishes_only_due_drafts(self):
+        now = timezone.now()
+        due = [
+            self.create_draft(str(i), now - timedelta(minutes=i))
+            for i in range(1, 4)
+        ]
+        future = self.create_draft("future", now + timedelta(hours=1))
+        draft = self.create_draft("draft")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            published = schedule_post(batch_size=2)
+
+        self.assertEqual(published, 3)
+        self.assertEqual(
+            set(
+                Post.objects.filter(is_publish=True).values_list(
+                    "id", flat=True
+                )
+            ),
+            {post.id for post in due},
+        )
+        self.assertEqual(
+            {call.args[0] for call in self.fan_out.call_args_list},
+            {post.id for post in due},
+        )
+        for post in [future, draft]:
+            post.refresh_from_db()
+            self.assertFalse(post.is_publish)
+
+    def test_published_post_is_dated_by_publish_time(self):
+        publish_at = timezone.now() - timedelta(minutes=5)
+        post = self.create_draft("due", publish_at)
+        newer = Post.objects.create(
+            title="newer", author=self.author, content="text"
+        )
+
+        schedule_post()
+
+        post.refresh_from_db()
+        self.assertTrue(post.is_publish)
+        self.assertGreaterEqual(post.date_created, newer.date_created)
+        self.assertEqual(Post.objects.first(), post)
+
+    def test_nothing_due_runs_one_statement(self):
+        self.create_draft("draft")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(schedule_post(), 0)
+        statements = [
+            query["sql"]
+            for query in queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(len(statements), 1)
+        self.fan_out.assert_not_called()
+
+
+class SchedulePostApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        UserProfile.objects.create(user=user)
+        self.client.force_authenticate(user)
+        self.url = reverse("posts:post-create")
+
+    def test_future_publish_at_creates_draft(self):
+        publish_at = timezone.now() + timedelta(hours=1)
+        res = self.client.post(
+            self.url,
+            {"title": "title", "content": "text", "publish_at": publish_at},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(res.data["is_publish"])
+        self.assertFalse(Post.objects.get(id=res.data["id"]).is_publish)
+
+    def test_past_publish_at_rejected(self):
+        publish_at = timezone.now() - timedelta(hours=1)
+        res = self.client.post(
+            self.url,
+            {"title": "title", "content": "text", "publish_at": publish_at},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from posts.models import Comments, Like, Post
+from user.models import Follow, UserProfile
+
+
+def graph() -> tuple:
+    """
+    Posts per author and follow edges, by the emails of the users, which
+    don't depend on the ids the database hands out.
+    """
+    posts = dict(
+        Post.objects.values("author__user__email")
+        .annotate(count=Count("id"))
+        .values_list("author__user__email", "count")
+    )
+    follows = set(
+        Follow.objects.values_list(
+            "follower__user__email", "followee__user__email"
+        )
+    )
+    return posts, follows
+
+
+class SeedSocialGraphTest(TestCase):
+    def seed(self, **options):
+        call_command(
+            "seed_social_graph",
+            **{
+                "users": 30,
+                "posts": 100,
+                "comments": 80,
+                "likes": 200,
+                "follows": 150,
+                "batch_size": 40,
+                "seed": 1,
+                **options,
+            },
+            stdout=StringIO(),
+        )
+
+    def test_seeds_graph_with_counters(self):
+        self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 30)
+        self.assertEqual(UserProfile.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comments.objects.count(), 80)
+        self.assertTrue(Like.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            Post.objects.aggregate(total=Sum("like_count"))["total"],
+            Like.objects.count(),
+        )
+        self.assertEqual(
+            UserProfile.objects.aggregate(total=Sum("followers_count"))[
+                "total"
+            ],
+            Follow.objects.count(),
+        )
+
+    def test_refuses_to_reseed(self):
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+    def test_same_seed_same_graph(self):
+        self.seed()
+        first = graph()
+        # Flushes the seeded rows; everything else cascades from the users.
+        get_user_model().objects.all().delete()
+
+        self.seed()
+        self.assertEqual(graph(), first)
+        self.assertTrue(all(first))
+
+        get_user_model().objects.all().delete()
+        self.seed(seed=2)
+        self.assertNotEqual(graph(), first)
+
+    def test_followers_are_skewed(self):
+        # Enough profiles that the popular ones don't run out of followers.
+        self.seed(users=1000, posts=0, follows=5000, batch_size=1000)
+
+        followers = list(
+            UserProfile.objects.order_by("-followers_count").values_list(
+                "followers_count", flat=True
+            )
+        )
+        top = sum(followers[: len(followers) // 10])
+        self.assertGreater(top, sum(followers) / 2)
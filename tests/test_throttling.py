@@ -0,0 +1,170 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from redis import ConnectionError
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import Post
+from tests.test_like_buffer import FakeRedisMixin
+from throttling import RedisScopedRateThrottle
+from user.models import UserProfile
+
+RATES = {
+    "anon": "2/min",
+    "read": "3/min",
+    "write": "3/min",
+    "like": "2/min",
+    "follow": "2/min",
+    "post_create": "2/min",
+}
+# Start of a minute, so that every window starts at a whole minute.
+NOW = 60 * 29_000_000
+
+
+class RedisScopedRateThrottleTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = NOW
+        for attribute, value in (
+            ("THROTTLE_RATES", RATES),
+            ("timer", lambda throttle: self.now),
+        ):
+            patcher = mock.patch.object(
+                RedisScopedRateThrottle, attribute, value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user, username="astronaut"
+        )
+        self.post = Post.objects.create(
+            title="title", author=self.profile, content="content"
+        )
+        self.client.force_authenticate(self.user)
+
+    def like(self):
+        return self.client.post(
+            reverse("posts:posts-like", args=[self.post.id])
+        )
+
+    def test_limit_and_headers(self):
+        res = self.like()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-RateLimit-Limit"], "2")
+        self.assertEqual(res["X-RateLimit-Remaining"], "1")
+        self.assertEqual(res["X-RateLimit-Reset"], "60")
+
+        res = self.like()
+        self.assertEqual(res["X-RateLimit-Remaining"], "0")
+
+        res = self.like()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["X-RateLimit-Remaining"], "0")
+        self.assertEqual(res["Retry-After"], "60")
+
+    def test_window_slides(self):
+        self.like()
+        self.like()
+
+        # 3/4 of the previous window still count: 1.5 requests.
+        self.now = NOW + 75
+        self.assertEqual(self.like().status_code, status.HTTP_200_OK)
+        res = self.like()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Down to 1 request once half of the previous window has passed.
+        self.assertEqual(res["Retry-After"], "15")
+
+    def test_scopes_are_separate(self):
+        self.like()
+        self.like()
+        self.assertEqual(
+            self.like().status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+        res = self.client.get(
+            reverse("posts:posts-detail", args=[self.post.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-RateLimit-Limit"], "3")
+
+        other = UserProfile.objects.create(
+            user=get_user_model().objects.create_user(
+                "other@astronaut.com", "password"
+            ),
+            username="other",
+        )
+        res = self.client.post(reverse("user:follower-add", args=[other.id]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.redis.keys("throttle:follow:*"),
+            [f"throttle:follow:{self.user.pk}:{NOW // 60}".encode()],
+        )
+
+        res = self.client.post(
+            reverse("posts:post-create"), {"title": "new", "content": "new"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(self.redis.keys("throttle:post_create:*"))
+
+    def test_users_are_separate(self):
+        self.like()
+        self.like()
+
+        other = get_user_model().objects.create_user(
+            "other@astronaut.com", "password"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.like().status_code, status.HTTP_200_OK)
+
+    def test_anonymous_requests_are_limited_by_ip(self):
+        self.client.force_authenticate(None)
+        url = reverse("posts:posts-list")
+        self.client.get(url)
+        self.client.get(url)
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.redis.keys("throttle:anon:*"),
+            [f"throttle:anon:127.0.0.1:{NOW // 60}".encode()],
+        )
+
+    def test_redis_down_lets_requests_through(self):
+        self.redis.register_script = mock.Mock(side_effect=ConnectionError)
+        for _ in range(3):
+            res = self.like()
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("X-RateLimit-Limit", res)
+
+    def test_async_views_are_limited(self):
+        url = reverse("posts:async-post-list")
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.get(url).status_code, status.HTTP_200_OK)
+
+        res = client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["X-RateLimit-Limit"], "2")
+        self.assertEqual(res["X-RateLimit-Remaining"], "0")
+        self.assertEqual(res["Retry-After"], "60")
+        self.assertIn("detail", res.json())
+
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        res = client.get(
+            reverse("user:async-userprofile-detail", args=[self.profile.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-RateLimit-Limit"], "3")
+        self.assertEqual(res["X-RateLimit-Remaining"], "2")
+        self.assertTrue(self.redis.keys("throttle:read:*"))
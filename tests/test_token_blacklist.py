@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user import services
+from user.tasks import purge_expired_tokens
+
+
+class LogoutEverywhereTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.tokens = [RefreshToken.for_user(self.user) for _ in range(3)]
+
+    def test_blacklists_every_token_in_one_query(self):
+        self.tokens[0].blacklist()
+        with self.assertNumQueries(1):
+            self.assertEqual(services.blacklist_all_tokens(self.user), 2)
+        self.assertEqual(BlacklistedToken.objects.count(), 3)
+
+    def test_refresh_fails_after_logout(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.post(reverse("user:logout"), {"all": True})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        for token in self.tokens:
+            res = client.post(
+                reverse("user:token_refresh"), {"refresh": str(token)}
+            )
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PurgeExpiredTokensTest(TestCase):
+    def test_deletes_expired_tokens_in_batches(self):
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        now = timezone.now()
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                user=user,
+                jti=str(index),
+                token=str(index),
+                expires_at=now + timedelta(days=1 if index < 2 else -1),
+            )
+            for index in range(5)
+        )
+        BlacklistedToken.objects.bulk_create(
+            BlacklistedToken(token=token) for token in tokens[1:4]
+        )
+
+        self.assertEqual(purge_expired_tokens(batch_size=2), 3)
+
+        self.assertQuerysetEqual(
+            OutstandingToken.objects.order_by("id"),
+            tokens[:2],
+        )
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list("token", flat=True)),
+            [tokens[1].id],
+        )
@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from posts.models import Post
+from user import services
+from user.models import UserProfile
+
+PROFILE_URL = reverse("user:userprofile-list")
+AUTOCOMPLETE_URL = reverse("user:userprofile-autocomplete")
+
+
+def has_gin_trigram() -> bool:
+    """Whether the database has the `gin_trgm_ops` GIN operator class"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_opclass JOIN pg_am ON pg_am.oid = opcmethod "
+            "WHERE opcname = 'gin_trgm_ops' AND amname = 'gin'"
+        )
+        return cursor.fetchone() is not None
+
+
+def sample_profile(email: str, username: str) -> UserProfile:
+    user = get_user_model().objects.create_user(email, "password")
+    return UserProfile.objects.create(user=user, username=username)
+
+
+class UserSearchApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.profile = sample_profile("me@test.com", "me")
+        self.client.force_authenticate(self.profile.user)
+        self.robert = sample_profile("robert@test.com", "robert")
+        self.roberta = sample_profile("roberta@test.com", "roberta_k")
+        self.alice = sample_profile("alice@test.com", "alice")
+
+    def test_search_ranks_by_similarity(self):
+        res = self.client.get(PROFILE_URL, {"q": "robert"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [profile["id"] for profile in res.data["results"]],
+            [self.robert.id, self.roberta.id],
+        )
+
+    def test_search_matches_email(self):
+        res = self.client.get(PROFILE_URL, {"q": "alice@test"})
+        self.assertEqual(res.data["results"][0]["id"], self.alice.id)
+
+    def test_autocomplete_prefix(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "Rob"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [profile["username"] for profile in res.data],
+            ["robert", "roberta_k"],
+        )
+        self.assertEqual(
+            set(res.data[0]), {"id", "username", "profile_image"}
+        )
+
+    def test_autocomplete_is_capped(self):
+        for index in range(15):
+            sample_profile(f"bob{index}@test.com", f"bob{index}")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "bob"})
+
+        self.assertEqual(len(res.data), 10)
+
+    def test_autocomplete_without_prefix(self):
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL)
+        self.assertEqual(res.data, [])
+
+
+class UserProfileListQueriesTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.profile = sample_profile("me@test.com", "me")
+        self.client.force_authenticate(self.profile.user)
+        for i in range(9):
+            profile = sample_profile(f"user{i}@test.com", f"user{i}")
+            Post.objects.create(title=str(i), author=profile, content="")
+            services.follow(self.profile, profile)
+
+    def test_list_runs_one_query_at_any_page_size(self):
+        for page_size in (1, 10):
+            with self.assertNumQueries(1):
+                res = self.client.get(PROFILE_URL, {"page_size": page_size})
+            self.assertEqual(len(res.data["results"]), page_size)
+
+    def test_list_counts(self):
+        res = self.client.get(PROFILE_URL, {"page_size": 10})
+        counts = {
+            profile["id"]: (
+                profile["count_posts"],
+                profile["followers_count"],
+                profile["following_count"],
+            )
+            for profile in res.data["results"]
+        }
+        self.assertEqual(counts.pop(self.profile.id), (0, 0, 9))
+        self.assertEqual(set(counts.values()), {(1, 1, 0)})
+
+
+class UserSearchIndexTest(TestCase):
+    def setUp(self):
+        if not has_gin_trigram():
+            self.skipTest("needs the pg_trgm extension")
+
+    def explain(self, queryset) -> str:
+        with connection.cursor() as cursor:
+            # The tables are tiny; make the planner show what it can use.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_username_lookups_use_index(self):
+        for lookup in ("username__istartswith", "username__icontains"):
+            queryset = UserProfile.objects.filter(**{lookup: "bob"})
+            with self.subTest(lookup=lookup):
+                self.assertIn(
+                    "profile_username_up_trgm_idx", self.explain(queryset)
+                )
+
+    def test_email_lookup_uses_index(self):
+        self.assertIn(
+            "user_email_upper_trgm_idx",
+            self.explain(
+                get_user_model().objects.filter(email__icontains="bob")
+            ),
+        )
@@ -3,11 +3,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from user_profile.models import UserProfile
-from user_profile.serializers import (
-    UserProfileListSerializer,
-    UserProfileDetailSerializer,
-)
+from user.models import Follow, UserProfile
+from user.serializers import UserProfileDetailSerializer
+from user.services import follow
 
 
 def sample_profile(**params):
@@ -28,7 +26,7 @@ class UnauthenticatedUserProfileAPITestCase(APITestCase):
 
     def test_create_profile_auth_required(self):
         payload = {"user": self.user, "username": "test userrname"}
-        url = reverse("user_profile:userprofile-create")
+        url = reverse("user:userprofile-create")
         res = self.client.post(url, payload)
 
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -36,26 +34,26 @@ class UnauthenticatedUserProfileAPITestCase(APITestCase):
     def test_get_profile_list_auth_required(self):
         sample_profile(user=self.user, username="username")
         sample_profile(user=self.another_user, username="another username")
-        url = reverse("user_profile:userprofile-list")
+        url = reverse("user:userprofile-list")
         res = self.client.get(url)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_profile_detail(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-detail", args=[profile.id])
+        url = reverse("user:userprofile-detail", args=[profile.id])
         res = self.client.get(url)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_update_profile_auth_required(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-update", args=[profile.id])
+        url = reverse("user:userprofile-update", args=[profile.id])
         payload = {"username": "new username"}
         res = self.client.patch(url, payload)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_delete_profile_auth_required(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-update", args=[profile.id])
+        url = reverse("user:userprofile-update", args=[profile.id])
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
@@ -73,19 +71,22 @@ class AuthenticatedUserProfileAPITest(APITestCase):
 
     def test_create_profile_auth_required(self):
         payload = {"user": self.user, "username": "test userrname"}
-        url = reverse("user_profile:userprofile-create")
+        url = reverse("user:userprofile-create")
         res = self.client.post(url, payload)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
     def test_get_profile_list_auth_required(self):
         sample_profile(user=self.user, username="username")
         sample_profile(user=self.another_user, username="another username")
-        url = reverse("user_profile:userprofile-list")
+        url = reverse("user:userprofile-list")
         res = self.client.get(url)
-        profiles = UserProfile.objects.all()
-        serializer = UserProfileListSerializer(profiles, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, res.data)
+        self.assertEqual(
+            {profile["id"] for profile in res.data["results"]},
+            set(UserProfile.objects.values_list("id", flat=True)),
+        )
+        for profile in res.data["results"]:
+            self.assertEqual(profile["count_posts"], 0)
 
     def test_add_to_profile_followers(self):
         self.client.force_authenticate(self.another_user)
@@ -93,43 +94,31 @@ class AuthenticatedUserProfileAPITest(APITestCase):
         profile2 = sample_profile(
             user=self.another_user, username="another username"
         )
-        url = reverse(
-            "user_profile:follower-add",
-            args=[self.user.id],
-        )
+        url = reverse("user:follower-add", args=[profile1.id])
         res = self.client.post(url)
-        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
-
-        url_detail_user = reverse(
-            "user_profile:userprofile-detail", args={profile1.id}
-        )
-        url_detail_another_user = reverse(
-            "user_profile:userprofile-detail", args={profile2.id}
-        )
-        res_detail_user = self.client.get(url_detail_user)
-        res_detail_another_user = self.client.get(url_detail_another_user)
-
-        res_all_profile = self.client.get(
-            reverse("user_profile:userprofile-list")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {"is_following": True, "followers_count": 1, "following_count": 1},
         )
 
-        profiles = UserProfile.objects.all()
-        serializer = UserProfileListSerializer(profiles, many=True)
-
-        self.assertEqual(serializer.data, res_all_profile.data)
-        self.assertIn(
-            self.another_user.email,
-            res_detail_user.data["followers"],
+        res_detail_user = self.client.get(
+            reverse("user:userprofile-detail", args=[profile1.id])
         )
-        self.assertNotIn(
-            self.another_user.email,
-            res_detail_user.data["following"],
+        res_detail_another_user = self.client.get(
+            reverse("user:userprofile-detail", args=[profile2.id])
         )
-        self.assertIn(
-            self.user.email, res_detail_another_user.data["following"]
+        self.assertEqual(res_detail_user.data["followers_count"], 1)
+        self.assertEqual(res_detail_user.data["following_count"], 0)
+        self.assertEqual(res_detail_another_user.data["followers_count"], 0)
+        self.assertEqual(res_detail_another_user.data["following_count"], 1)
+
+        res_followers = self.client.get(
+            reverse("user:userprofile-followers", args=[profile1.id])
         )
-        self.assertNotIn(
-            self.user.email, res_detail_another_user.data["followers"]
+        self.assertEqual(
+            [profile["id"] for profile in res_followers.data["results"]],
+            [profile2.id],
         )
 
     def test_remove_followers(self):
@@ -138,48 +127,34 @@ class AuthenticatedUserProfileAPITest(APITestCase):
         profile2 = sample_profile(
             user=self.another_user, username="another username"
         )
-        profile1.followers.add(self.another_user)
-        profile2.following.add(self.user)
+        follow(profile2, profile1)
 
         res = self.client.post(
-            reverse("user_profile:-follower-remove", args=[self.user.id])
-        )
-        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
-
-        url_detail_user = reverse(
-            "user_profile:userprofile-detail", args={profile1.id}
-        )
-        url_detail_another_user = reverse(
-            "user_profile:userprofile-detail", args={profile2.id}
+            reverse("user:-follower-remove", args=[profile1.id])
         )
-        res_detail_user = self.client.get(url_detail_user)
-        res_detail_another_user = self.client.get(url_detail_another_user)
-
-        res_all_profile = self.client.get(
-            reverse("user_profile:userprofile-list")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {
+                "is_following": False,
+                "followers_count": 0,
+                "following_count": 0,
+            },
         )
-        profiles = UserProfile.objects.all()
-        serializer = UserProfileListSerializer(profiles, many=True)
 
-        self.assertEqual(serializer.data, res_all_profile.data)
-        self.assertNotIn(
-            self.another_user.email,
-            res_detail_user.data["followers"],
-        )
-        self.assertNotIn(
-            self.another_user.email,
-            res_detail_user.data["following"],
-        )
-        self.assertNotIn(
-            self.user.email, res_detail_another_user.data["following"]
+        res_detail_user = self.client.get(
+            reverse("user:userprofile-detail", args=[profile1.id])
         )
-        self.assertNotIn(
-            self.user.email, res_detail_another_user.data["followers"]
+        res_detail_another_user = self.client.get(
+            reverse("user:userprofile-detail", args=[profile2.id])
         )
+        self.assertEqual(res_detail_user.data["followers_count"], 0)
+        self.assertEqual(res_detail_another_user.data["following_count"], 0)
+        self.assertFalse(Follow.objects.exists())
 
     def test_profile_detail(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-detail", args=[profile.id])
+        url = reverse("user:userprofile-detail", args=[profile.id])
         res = self.client.get(url)
         profiles = UserProfile.objects.get(user=self.user)
         serializer = UserProfileDetailSerializer(profiles)
@@ -188,7 +163,7 @@ class AuthenticatedUserProfileAPITest(APITestCase):
 
     def test_update_profile_auth_required(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-update", args=[profile.id])
+        url = reverse("user:userprofile-update", args=[profile.id])
         payload = {"username": "new username"}
         res = self.client.patch(url, payload)
         profiles = UserProfile.objects.get(user=self.user)
@@ -198,6 +173,6 @@ class AuthenticatedUserProfileAPITest(APITestCase):
 
     def test_delete_profile_auth_required(self):
         profile = sample_profile(user=self.user, username="old username")
-        url = reverse("user_profile:userprofile-update", args=[profile.id])
+        url = reverse("user:userprofile-update", args=[profile.id])
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,158 @@
+"""
+Rate limits shared by every worker, kept in Redis.
+
+`RedisScopedRateThrottle` counts the requests of each user (or IP address
+for anonymous clients) per scope, with the rates of
+`DEFAULT_THROTTLE_RATES`:
+
+    anon         every anonymous request
+    read         safe methods
+    write        other requests
+    like, follow, post_create
+                 views that set `throttle_scope` (`@throttle_scope` for
+                 function views, `throttle_scope=` for viewset actions)
+
+The limit applies over a sliding window, approximated with the counters of
+the current and the previous fixed window: the previous one is weighted by
+the part of it still inside the window. Checking and counting a request is
+one Lua script, so it is atomic and O(1) whatever the rate. When Redis is
+down requests are let through.
+
+`RateLimitHeadersMiddleware` reports the limit of the request in the
+`X-RateLimit-Limit`, `X-RateLimit-Remaining` and `X-RateLimit-Reset`
+(seconds until the current fixed window ends) headers.
+"""
+import math
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.deprecation import MiddlewareMixin
+from redis import RedisError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from social_media_api import redis_client
+
+# KEYS: counters of the current and the previous window. ARGV: the limit,
+# the weight of the previous window and the lifetime of a counter.
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if previous * tonumber(ARGV[2]) + current >= tonumber(ARGV[1]) then
+    return {0, current, previous}
+end
+redis.call("INCR", KEYS[1])
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return {1, current + 1, previous}
+"""
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    remaining: int
+    reset: float
+
+
+def throttle_scope(scope: str):
+    """
+    Sets the throttle scope of the function view `view`; goes above
+    `@api_view`. Class views set `throttle_scope` instead.
+    """
+
+    def decorator(view):
+        view.cls.throttle_scope = scope
+        return view
+
+    return decorator
+
+
+class RedisScopedRateThrottle(SimpleRateThrottle):
+    cache_format = "throttle:{scope}:{ident}"
+
+    def __init__(self):
+        # The scope, and so the rate, depends on the request.
+        self.wait_seconds = None
+
+    def get_scope(self, request, view) -> str:
+        if not request.user.is_authenticated:
+            return "anon"
+        scope = getattr(view, "throttle_scope", None)
+        if scope:
+            return scope
+        return "read" if request.method in SAFE_METHODS else "write"
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format.format(scope=self.scope, ident=ident)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        key = self.get_cache_key(request, view)
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        weight = (self.duration - elapsed) / self.duration
+        try:
+            client = redis_client.get_redis()
+            script = client.register_script(SLIDING_WINDOW_SCRIPT)
+            allowed, current, previous = script(
+                keys=[f"{key}:{window}", f"{key}:{window - 1}"],
+                args=[self.num_requests, weight, self.duration * 2],
+            )
+        except RedisError:
+            return True
+
+        count = previous * weight + current
+        # The Django request, also when `request` is a DRF one.
+        getattr(request, "_request", request).rate_limit = RateLimit(
+            limit=self.num_requests,
+            remaining=max(0, math.floor(self.num_requests - count)),
+            reset=self.duration - elapsed,
+        )
+        if allowed:
+            return True
+        self.wait_seconds = self.get_wait(current, previous, elapsed)
+        return False
+
+    def get_wait(self, current: int, previous: int, elapsed: float):
+        """
+        Seconds until the weighted count of the window drops below the
+        limit.
+        """
+        limit, duration = self.num_requests, self.duration
+        if current < limit:
+            # Enough of the previous window slides out before this one ends.
+            slide = (limit - current) * duration / previous
+            return max(0, duration - elapsed - slide)
+        return duration - elapsed + duration * (1 - limit / current)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RateLimitHeadersMiddleware(MiddlewareMixin):
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    @staticmethod
+    def add_headers(request, response):
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = str(rate_limit.limit)
+            response["X-RateLimit-Remaining"] = str(rate_limit.remaining)
+            response["X-RateLimit-Reset"] = str(math.ceil(rate_limit.reset))
+        return response
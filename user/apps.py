@@ -2,9 +2,13 @@ from django.apps import AppConfig
 
 
 class UserConfig(AppConfig):
+    default = True
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
 
+    def ready(self):
+        from user import signals  # noqa: F401
+
 
 class UserProfileConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
@@ -0,0 +1,22 @@
+"""
+Async variant of the profile detail endpoint, for deployments under ASGI.
+"""
+from django.http import JsonResponse
+from rest_framework.exceptions import NotFound
+
+from async_api import aserialize, async_api_view
+from user.models import UserProfile
+from user.serializers import UserProfileDetailSerializer
+
+
+@async_api_view(authenticated=True)
+async def profile_detail(request, pk):
+    """
+    GET -> /async/user_profile/<id>/ -> the profile with the ID
+    """
+    try:
+        profile = await UserProfile.objects.select_related("user").aget(pk=pk)
+    except UserProfile.DoesNotExist:
+        raise NotFound()
+    data = await aserialize(UserProfileDetailSerializer, profile, request)
+    return JsonResponse(data)
@@ -0,0 +1,182 @@
+"""
+JWT authentication that reads the user from a cache instead of Postgres.
+
+The user row (without the password hash) and the id of the user's profile
+are cached twice: for `AUTH_CACHE_LOCAL_TTL` seconds in the local memory
+of the process and for `AUTH_CACHE_TTL` seconds in Redis. Saving or
+deleting the user or the profile drops both entries (see `user.signals`);
+the local entries of other processes expire on their own.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from redis import RedisError
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+import metrics
+from user.models import UserProfile
+
+LOCAL_CACHE_ALIAS = "default"
+AUTH_CACHE_ALIAS = "auth"
+
+
+def cache_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def user_fields() -> list:
+    """
+    Cached fields of the user. The password hash stays out of Redis.
+    """
+    return [
+        field.attname
+        for field in get_user_model()._meta.concrete_fields
+        if field.attname != "password"
+    ]
+
+
+def load_user_row(user_id):
+    """
+    The cached fields of user `user_id` and the id of their profile (or
+    None), in one query. None if there is no such user.
+    """
+    return (
+        get_user_model()
+        .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values(*user_fields(), profile_pk=F("profile__id"))
+        .first()
+    )
+
+
+def get_cached_user(user_id):
+    """
+    User `user_id` with a `profile_id` attribute, from the local cache,
+    else from Redis, else from the database. None if there is no such
+    user.
+    """
+    key = cache_key(user_id)
+    local_cache = caches[LOCAL_CACHE_ALIAS]
+    row = local_cache.get(key)
+    if row is None:
+        try:
+            row = caches[AUTH_CACHE_ALIAS].get(key)
+        except RedisError:
+            row = None
+        if row is None:
+            metrics.CACHE_REQUESTS.labels("auth", "miss").inc()
+            row = load_user_row(user_id)
+            if row is None:
+                return None
+            try:
+                caches[AUTH_CACHE_ALIAS].set(
+                    key, row, settings.AUTH_CACHE_TTL
+                )
+            except RedisError:
+                pass
+        else:
+            metrics.CACHE_REQUESTS.labels("auth", "shared_hit").inc()
+        local_cache.set(key, row, settings.AUTH_CACHE_LOCAL_TTL)
+    else:
+        metrics.CACHE_REQUESTS.labels("auth", "local_hit").inc()
+
+    fields = user_fields()
+    user = get_user_model().from_db(
+        DEFAULT_DB_ALIAS, fields, [row[field] for field in fields]
+    )
+    user.profile_id = row["profile_pk"]
+    return user
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Drops the cached user `user_id` once the current transaction commits.
+    """
+    key = cache_key(user_id)
+
+    def delete():
+        caches[LOCAL_CACHE_ALIAS].delete(key)
+        try:
+            caches[AUTH_CACHE_ALIAS].delete(key)
+        except RedisError:
+            pass
+
+    transaction.on_commit(delete, robust=True)
+
+
+def get_profile_id(user):
+    """
+    Id of the profile of `user`, or None. Authenticated by
+    `CachedJWTAuthentication`, the user already knows it; otherwise it
+    is looked up once and kept on `user`.
+    """
+    if not user.is_authenticated:
+        return None
+    if not hasattr(user, "profile_id"):
+        user.profile_id = (
+            UserProfile.objects.filter(user=user)
+            .values_list("id", flat=True)
+            .first()
+        )
+    return user.profile_id
+
+
+def get_request_profile_id(request) -> int:
+    """
+    Id of the profile of `request.user`, who must have one.
+    """
+    profile_id = get_profile_id(request.user)
+    if profile_id is None:
+        raise ValidationError("Create your user profile first.")
+    return profile_id
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` that gets the user from `get_cached_user()`, so
+    that warm requests make no authentication query.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            )
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(
+                "User is inactive", code="user_inactive"
+            )
+        return user
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of `CachedJWTAuthentication` for the plain async
+    views. The token is checked as by DRF, the user (with `profile_id`)
+    comes from `get_cached_user()` in a thread. Returns `AnonymousUser`
+    when there is no token, raises `AuthenticationFailed` (or
+    `InvalidToken`) when it is not valid.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return AnonymousUser()
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return AnonymousUser()
+    token = authentication.get_validated_token(raw_token)
+    return await sync_to_async(authentication.get_user)(token)
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:32
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0002_userprofile"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["email"],
+                name="user_email_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["username"],
+                name="profile_username_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+"""
+Copies the social graph from the `followers` and `following` M2M tables
+into `Follow`, then fills the follow counters.
+
+Both old tables describe the same edges from the two ends, so their union
+is inserted and duplicates are skipped. Users without a profile and
+self-follows can't be represented and are dropped. Runs in batches of
+`BATCH_SIZE` rows, each in its own transaction, so that a large graph
+doesn't hold locks for the whole copy.
+"""
+from django.db import migrations, transaction
+
+BATCH_SIZE = 10000
+
+# `m.user_id` follows the profile `m.userprofile_id`.
+COPY_FOLLOWERS_SQL = """
+    INSERT INTO {follow} (follower_id, followee_id, created_at)
+    SELECT p.id, m.userprofile_id, now()
+    FROM {through} m JOIN {profile} p ON p.user_id = m.user_id
+    WHERE m.id > %s AND m.id <= %s AND p.id <> m.userprofile_id
+    ON CONFLICT DO NOTHING
+"""
+
+# The profile `m.userprofile_id` follows `m.user_id`.
+COPY_FOLLOWING_SQL = """
+    INSERT INTO {follow} (follower_id, followee_id, created_at)
+    SELECT m.userprofile_id, p.id, now()
+    FROM {through} m JOIN {profile} p ON p.user_id = m.user_id
+    WHERE m.id > %s AND m.id <= %s AND p.id <> m.userprofile_id
+    ON CONFLICT DO NOTHING
+"""
+
+COUNT_SQL = """
+    UPDATE {profile} p SET
+        followers_count = (
+            SELECT COUNT(*) FROM {follow} f WHERE f.followee_id = p.id
+        ),
+        following_count = (
+            SELECT COUNT(*) FROM {follow} f WHERE f.follower_id = p.id
+        )
+    WHERE p.id > %s AND p.id <= %s
+"""
+
+# Reverse: every edge goes back into both old tables.
+RESTORE_FOLLOWERS_SQL = """
+    INSERT INTO {through} (userprofile_id, user_id)
+    SELECT f.followee_id, p.user_id
+    FROM {follow} f JOIN {profile} p ON p.id = f.follower_id
+    WHERE f.id > %s AND f.id <= %s
+    ON CONFLICT DO NOTHING
+"""
+
+RESTORE_FOLLOWING_SQL = """
+    INSERT INTO {through} (userprofile_id, user_id)
+    SELECT f.follower_id, p.user_id
+    FROM {follow} f JOIN {profile} p ON p.id = f.followee_id
+    WHERE f.id > %s AND f.id <= %s
+    ON CONFLICT DO NOTHING
+"""
+
+
+def run_batched(connection, sql: str, table: str) -> None:
+    """Run `sql` for consecutive id ranges of `table`"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        (last_id,) = cursor.fetchone()
+        for start in range(0, last_id, BATCH_SIZE):
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(sql, [start, start + BATCH_SIZE])
+
+
+def get_tables(apps) -> dict:
+    profile = apps.get_model("user", "UserProfile")
+    return {
+        "profile": profile._meta.db_table,
+        "follow": apps.get_model("user", "Follow")._meta.db_table,
+        "followers": profile.followers.through._meta.db_table,
+        "following": profile.following.through._meta.db_table,
+    }
+
+
+def copy_follows(apps, schema_editor):
+    tables = get_tables(apps)
+    connection = schema_editor.connection
+    for sql, through in [
+        (COPY_FOLLOWERS_SQL, tables["followers"]),
+        (COPY_FOLLOWING_SQL, tables["following"]),
+    ]:
+        run_batched(
+            connection,
+            sql.format(through=through, **tables),
+            through,
+        )
+    run_batched(connection, COUNT_SQL.format(**tables), tables["profile"])
+
+
+def restore_follows(apps, schema_editor):
+    tables = get_tables(apps)
+    connection = schema_editor.connection
+    for sql, through in [
+        (RESTORE_FOLLOWERS_SQL, tables["followers"]),
+        (RESTORE_FOLLOWING_SQL, tables["following"]),
+    ]:
+        run_batched(
+            connection,
+            sql.format(through=through, **tables),
+            tables["follow"],
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user", "0004_follow"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_follows, restore_follows),
+    ]
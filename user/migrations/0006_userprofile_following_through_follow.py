@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0005_copy_follows"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="userprofile",
+            name="followers",
+        ),
+        # Django can't alter an M2M to use a `through` model in place.
+        migrations.RemoveField(
+            model_name="userprofile",
+            name="following",
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="following",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="followers",
+                through="user.Follow",
+                to="user.userprofile",
+            ),
+        ),
+    ]
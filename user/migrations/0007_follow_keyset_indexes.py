@@ -0,0 +1,28 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0006_userprofile_following_through_follow"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="follow",
+            name="follow_followee_idx",
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["followee", "-id"], name="follow_followee_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["follower", "-id"], name="follow_follower_keyset_idx"
+            ),
+        ),
+    ]
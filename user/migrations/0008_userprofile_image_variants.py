@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0007_follow_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="profile_image_variants",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
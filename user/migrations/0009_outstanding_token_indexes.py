@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# The token tables belong to simplejwt, so the indexes are plain SQL,
+# built without locking the table against new logins.
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user", "0008_userprofile_image_variants"),
+        ("token_blacklist", "0011_linearizes_history"),
+    ]
+
+    operations = [
+        # Purge of expired tokens.
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "outstandingtoken_expires_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX CONCURRENTLY IF EXISTS outstandingtoken_expires_idx",
+        ),
+        # Log out everywhere: the unexpired tokens of a user.
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "outstandingtoken_user_expires_idx "
+            "ON token_blacklist_outstandingtoken (user_id, expires_at)",
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "outstandingtoken_user_expires_idx",
+        ),
+    ]
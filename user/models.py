@@ -5,7 +5,9 @@ from django.contrib.auth.models import (
     AbstractUser,
     BaseUserManager,
 )
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
@@ -55,6 +57,20 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(
+                fields=["email"],
+                name="user_email_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            # `icontains` compares `UPPER(email)`.
+            GinIndex(
+                OpClass(Upper("email"), name="gin_trgm_ops"),
+                name="user_email_upper_trgm_idx",
+            ),
+        ]
+
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -80,14 +96,70 @@ class UserProfile(models.Model):
     profile_image = models.ImageField(
         upload_to=movie_image_file_path, blank=True
     )
-    followers = models.ManyToManyField(
-        settings.AUTH_USER_MODEL,
-        related_name="follower",
-        blank=True,
-    )
+    # Thumbnail paths of `profile_image`, see `process_profile_image`.
+    profile_image_variants = models.JSONField(default=dict, editable=False)
     following = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, related_name="following", blank=True
+        "self",
+        through="Follow",
+        symmetrical=False,
+        related_name="followers",
+        blank=True,
     )
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["username"],
+                name="profile_username_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            # `icontains` and `istartswith` compare `UPPER(username)`.
+            GinIndex(
+                OpClass(Upper("username"), name="gin_trgm_ops"),
+                name="profile_username_up_trgm_idx",
+            ),
+        ]
 
     def get_posts_count(self):
         return self.posts.count()
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="follows",
+    )
+    followee = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="followed_by",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followee"],
+                name="unique_follow",
+            ),
+            models.CheckConstraint(
+                check=~models.Q(follower=models.F("followee")),
+                name="follow_not_self",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["followee", "-id"],
+                name="follow_followee_keyset_idx",
+            ),
+            models.Index(
+                fields=["follower", "-id"],
+                name="follow_follower_keyset_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} follows {self.followee_id}"
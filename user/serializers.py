@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from images import ImageVariantsField
+from metrics import TimedListSerializer, TimedModelSerializer
 from user.models import User, UserProfile
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ("id", "email", "password", "is_staff")
@@ -31,10 +33,11 @@ class UserListSerializer(UserSerializer):
 
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = ("id", "email", "full_name")
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -49,7 +52,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
         extra_kwargs = {"password": {"write_only": True, "min_length": 5}}
 
 
-class UserProfileCreateSerializer(serializers.ModelSerializer):
+class UserProfileCreateSerializer(TimedModelSerializer):
     class Meta:
         model = UserProfile
         fields = (
@@ -60,19 +63,14 @@ class UserProfileCreateSerializer(serializers.ModelSerializer):
         )
 
 
-class UserProfileDetailSerializer(serializers.ModelSerializer):
+class UserProfileDetailSerializer(TimedModelSerializer):
     user_id = serializers.IntegerField(source="user.id", read_only=True)
     email = serializers.EmailField(source="user.email", read_only=True)
     first_name = serializers.CharField(
         source="user.first_name", read_only=True
     )
     last_name = serializers.CharField(source="user.last_name", read_only=True)
-    followers = serializers.SlugRelatedField(
-        slug_field="email", many=True, read_only=True
-    )
-    following = serializers.SlugRelatedField(
-        slug_field="email", many=True, read_only=True
-    )
+    profile_images = ImageVariantsField(source="profile_image_variants")
 
     class Meta:
         model = UserProfile
@@ -85,29 +83,42 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
             "last_name",
             "bio",
             "profile_image",
-            "followers",
-            "following",
+            "profile_images",
+            "followers_count",
+            "following_count",
         )
-        read_only_fields = ("followers", "following")
+        read_only_fields = ("followers_count", "following_count")
 
 
-class UserProfileListSerializer(serializers.ModelSerializer):
-    count_posts = serializers.IntegerField(source="get_posts_count")
+class UserProfileListSerializer(TimedModelSerializer):
+    count_posts = serializers.IntegerField(
+        source="posts_count", read_only=True
+    )
+    profile_images = ImageVariantsField(source="profile_image_variants")
 
     class Meta:
         model = UserProfile
+        list_serializer_class = TimedListSerializer
         fields = (
             "id",
             "user_id",
             "username",
             "count_posts",
             "profile_image",
-            "followers",
-            "following",
+            "profile_images",
+            "followers_count",
+            "following_count",
         )
 
 
-class FanSerializer(serializers.ModelSerializer):
+class UserProfileCompactSerializer(TimedModelSerializer):
+    class Meta:
+        model = UserProfile
+        list_serializer_class = TimedListSerializer
+        fields = ("id", "username", "profile_image")
+
+
+class FanSerializer(TimedModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
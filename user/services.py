@@ -0,0 +1,137 @@
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from posts import feed
+from user.models import Follow, UserProfile
+
+FOLLOW_SQL = """
+    WITH changed AS (
+        INSERT INTO {follow_table} (follower_id, followee_id, created_at)
+        VALUES (%(follower)s, %(followee)s, now())
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    )
+    UPDATE {profile_table} SET
+        followers_count = followers_count
+            + CASE WHEN id = %(followee)s THEN 1 ELSE 0 END,
+        following_count = following_count
+            + CASE WHEN id = %(follower)s THEN 1 ELSE 0 END
+    WHERE id IN (%(follower)s, %(followee)s)
+    AND EXISTS (SELECT 1 FROM changed)
+    RETURNING id, followers_count, following_count
+"""
+
+UNFOLLOW_SQL = """
+    WITH changed AS (
+        DELETE FROM {follow_table}
+        WHERE follower_id = %(follower)s AND followee_id = %(followee)s
+        RETURNING id
+    )
+    UPDATE {profile_table} SET
+        followers_count = followers_count
+            - CASE WHEN id = %(followee)s THEN 1 ELSE 0 END,
+        following_count = following_count
+            - CASE WHEN id = %(follower)s THEN 1 ELSE 0 END
+    WHERE id IN (%(follower)s, %(followee)s)
+    AND EXISTS (SELECT 1 FROM changed)
+    RETURNING id, followers_count, following_count
+"""
+
+BLACKLIST_ALL_SQL = """
+    INSERT INTO {blacklisted_table} (token_id, blacklisted_at)
+    SELECT id, now() FROM {outstanding_table}
+    WHERE user_id = %(user)s AND expires_at > now()
+    ON CONFLICT (token_id) DO NOTHING
+"""
+
+PURGE_EXPIRED_TOKENS_SQL = """
+    WITH expired AS (
+        SELECT id FROM {outstanding_table}
+        WHERE expires_at <= now()
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ), blacklisted AS (
+        DELETE FROM {blacklisted_table}
+        WHERE token_id IN (SELECT id FROM expired)
+    )
+    DELETE FROM {outstanding_table}
+    WHERE id IN (SELECT id FROM expired)
+"""
+
+
+def _token_sql(sql: str) -> str:
+    return sql.format(
+        blacklisted_table=BlacklistedToken._meta.db_table,
+        outstanding_table=OutstandingToken._meta.db_table,
+    )
+
+
+def _change_follow(
+    sql: str, follower: UserProfile, followee: UserProfile
+) -> bool:
+    """
+    Runs `sql` (insert or delete of the edge together with the counters of
+    both profiles) as one statement. Refreshes the counters of `follower`
+    and `followee` and returns True if the edge changed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(
+                follow_table=Follow._meta.db_table,
+                profile_table=UserProfile._meta.db_table,
+            ),
+            {"follower": follower.pk, "followee": followee.pk},
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return False
+    profiles = {follower.pk: follower, followee.pk: followee}
+    for pk, followers_count, following_count in rows:
+        profiles[pk].followers_count = followers_count
+        profiles[pk].following_count = following_count
+    # The feed of `follower` now has other authors in it.
+    transaction.on_commit(lambda: feed.drop_inbox(follower.pk), robust=True)
+    return True
+
+
+def follow(follower: UserProfile, followee: UserProfile) -> bool:
+    """
+    `follower` starts following `followee`. Returns False if it already
+    did.
+    """
+    if follower.pk == followee.pk:
+        raise ValidationError("You can not follow yourself")
+    return _change_follow(FOLLOW_SQL, follower, followee)
+
+
+def unfollow(follower: UserProfile, followee: UserProfile) -> bool:
+    """
+    `follower` stops following `followee`. Returns False if it didn't.
+    """
+    return _change_follow(UNFOLLOW_SQL, follower, followee)
+
+
+def blacklist_all_tokens(user) -> int:
+    """
+    Blacklists every unexpired refresh token of `user` in one statement.
+    Returns the number of newly blacklisted tokens.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_token_sql(BLACKLIST_ALL_SQL), {"user": user.pk})
+        return cursor.rowcount
+
+
+def purge_expired_tokens(batch_size: int) -> int:
+    """
+    Deletes up to `batch_size` expired outstanding tokens with their
+    blacklist entries, in one statement. Returns the number deleted.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _token_sql(PURGE_EXPIRED_TOKENS_SQL), {"batch_size": batch_size}
+        )
+        return cursor.rowcount
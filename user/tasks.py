@@ -0,0 +1,38 @@
+from celery import shared_task
+
+import images
+from user import services
+from user.models import UserProfile
+
+TOKEN_PURGE_BATCH_SIZE = 5000
+
+
+@shared_task()
+def process_profile_image(profile_id, name):
+    """
+    Strips EXIF from the avatar `name` of profile `profile_id` and stores
+    its thumbnails, unless the avatar was replaced meanwhile.
+    """
+    profile = UserProfile.objects.filter(
+        pk=profile_id, profile_image=name
+    ).first()
+    if profile is None:
+        return
+    variants = images.process_image(profile.profile_image.storage, name)
+    UserProfile.objects.filter(pk=profile_id, profile_image=name).update(
+        profile_image_variants=variants
+    )
+
+
+@shared_task()
+def purge_expired_tokens(batch_size=TOKEN_PURGE_BATCH_SIZE):
+    """
+    Deletes the expired outstanding and blacklisted tokens, `batch_size`
+    at a time, so that no statement holds many row locks for long.
+    """
+    purged = 0
+    while True:
+        deleted = services.purge_expired_tokens(batch_size)
+        purged += deleted
+        if deleted < batch_size:
+            return purged
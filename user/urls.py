@@ -5,14 +5,18 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
+from user import async_views
 from user.views import (
     CreateUserView,
     ManageUserView,
     APILogoutView,
     UserPostListAPIView,
+    UserProfileAutocompleteView,
     UserProfileListView,
     UserProfileCreateView,
     UserProfileDetailView,
+    UserProfileFollowersView,
+    UserProfileFollowingView,
     UserProfileUpdateDeleteView,
     add_follower,
     remove_follower,
@@ -33,6 +37,11 @@ urlpatterns = [
         UserProfileListView.as_view(),
         name="userprofile-list",
     ),
+    path(
+        "user_profile/autocomplete/",
+        UserProfileAutocompleteView.as_view(),
+        name="userprofile-autocomplete",
+    ),
     path(
         "user_profile/create/",
         UserProfileCreateView.as_view(),
@@ -48,6 +57,16 @@ urlpatterns = [
         UserProfileUpdateDeleteView.as_view(),
         name="userprofile-update",
     ),
+    path(
+        "user_profile/<int:pk>/followers/",
+        UserProfileFollowersView.as_view(),
+        name="userprofile-followers",
+    ),
+    path(
+        "user_profile/<int:pk>/following/",
+        UserProfileFollowingView.as_view(),
+        name="userprofile-following",
+    ),
     path(
         "user_profile/<int:pk>/followers-add/",
         add_follower,
@@ -58,4 +77,9 @@ urlpatterns = [
         remove_follower,
         name="-follower-remove",
     ),
+    path(
+        "async/user_profile/<int:pk>/",
+        async_views.profile_detail,
+        name="async-userprofile-detail",
+    ),
 ]
@@ -1,4 +1,7 @@
-from django.shortcuts import redirect
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import generics, permissions
 from rest_framework.decorators import api_view, permission_classes
@@ -7,22 +10,25 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.token_blacklist.models import (
-    OutstandingToken,
-    BlacklistedToken,
-)
 from rest_framework_simplejwt.tokens import RefreshToken
 
+import images
+from pagination import KeysetPagination, PostPagination, SearchPaginationMixin
+from throttling import throttle_scope
 from posts.models import Post
 from posts.serializers import PostListSerializer
-from user.models import UserProfile
+from user import services
+from user.authentication import get_profile_id
+from user.models import Follow, UserProfile
 from user.serializers import (
     UserSerializer,
     UserDetailSerializer,
+    UserProfileCompactSerializer,
     UserProfileListSerializer,
     UserProfileCreateSerializer,
     UserProfileDetailSerializer,
 )
+from user.tasks import process_profile_image
 
 """register user"""
 
@@ -48,9 +54,7 @@ class APILogoutView(APIView):
 
     def post(self, request, *args, **kwargs):
         if self.request.data.get("all"):
-            token: OutstandingToken
-            for token in OutstandingToken.objects.filter(user=request.user):
-                _, _ = BlacklistedToken.objects.get_or_create(token=token)
+            services.blacklist_all_tokens(request.user)
             return Response(
                 {"status": "OK, goodbye, all refresh tokens blacklisted"}
             )
@@ -64,25 +68,48 @@ class UserPostListAPIView(ListAPIView):
     """Search for all posts by a given author by his UserProfile ID"""
 
     serializer_class = PostListSerializer
+    pagination_class = PostPagination
 
     def get_queryset(self):
-        return (
-            Post.objects.filter(author__id=self.kwargs["pk"])
-            .select_related("author")
-            .prefetch_related("comments", "likes")
+        return Post.objects.filter(
+            author__id=self.kwargs["pk"]
+        ).select_related("author")
+
+
+class UserProfileListView(SearchPaginationMixin, generics.ListAPIView):
+    """
+    Profiles with their post and follow counts, one query per page: posts
+    are counted by a correlated subquery, follows are stored counters.
+    """
+
+    queryset = UserProfile.objects.only(
+        "id",
+        "user_id",
+        "username",
+        "profile_image",
+        "profile_image_variants",
+        "followers_count",
+        "following_count",
+    ).annotate(
+        posts_count=Coalesce(
+            Subquery(
+                Post.objects.filter(author=OuterRef("pk"))
+                .order_by()
+                .values("author")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
         )
-
-
-class UserProfileListView(generics.ListAPIView):
-    queryset = UserProfile.objects.select_related("user").prefetch_related(
-        "followers", "following", "posts"
     )
     serializer_class = UserProfileListSerializer
     permission_classes = (IsAuthenticated | permissions.IsAdminUser,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.query_params.get("user")
         username = self.request.query_params.get("username")
+        text = self.request.query_params.get("q")
 
         queryset = self.queryset
 
@@ -91,10 +118,31 @@ class UserProfileListView(generics.ListAPIView):
 
         if username:
             queryset = queryset.filter(username__icontains=username)
-        return queryset.distinct()
+
+        if text:
+            queryset = (
+                queryset.filter(
+                    Q(username__trigram_similar=text)
+                    | Q(user__email__trigram_similar=text)
+                )
+                .annotate(
+                    similarity=Greatest(
+                        TrigramSimilarity("username", text),
+                        TrigramSimilarity("user__email", text),
+                    )
+                )
+                .order_by("-similarity", "-id")
+            )
+        return queryset
 
     @extend_schema(
         parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Fuzzy search by username or email, "
+                "most similar first (ex. ?q=bob)",
+            ),
             OpenApiParameter(
                 name="user",
                 type=str,
@@ -111,27 +159,58 @@ class UserProfileListView(generics.ListAPIView):
         return super().list(request, *args, **kwargs)
 
 
+class UserProfileAutocompleteView(generics.ListAPIView):
+    """
+    Profiles whose username starts with `prefix`, for mention autocomplete.
+    Returns at most `limit` profiles in a single query.
+    """
+
+    serializer_class = UserProfileCompactSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = None
+    limit = 10
+
+    def get_queryset(self):
+        prefix = self.request.query_params.get("prefix", "").strip()
+        if not prefix:
+            return UserProfile.objects.none()
+        return (
+            UserProfile.objects.filter(username__istartswith=prefix)
+            .only("id", "username", "profile_image")
+            .order_by("username", "id")[: self.limit]
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="prefix",
+                type=str,
+                description="Beginning of the username (ex. ?prefix=bo)",
+            ),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class UserProfileCreateView(generics.CreateAPIView):
     queryset = UserProfile.objects.select_related("user")
     serializer_class = UserProfileCreateSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        profile = serializer.save(user=self.request.user)
+        images.schedule(process_profile_image, profile, "profile_image")
 
 
 class UserProfileDetailView(generics.RetrieveAPIView):
-    queryset = UserProfile.objects.select_related("user").prefetch_related(
-        "followers", "following", "posts"
-    )
+    queryset = UserProfile.objects.select_related("user")
     serializer_class = UserProfileDetailSerializer
     permission_classes = (IsAuthenticated | permissions.IsAdminUser,)
 
 
 class UserProfileUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = UserProfile.objects.select_related("user").prefetch_related(
-        "followers", "following"
-    )
+    queryset = UserProfile.objects.select_related("user")
     serializer_class = UserProfileDetailSerializer
     permission_classes = (IsAuthenticated | permissions.IsAdminUser,)
 
@@ -141,28 +220,88 @@ class UserProfileUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        if "profile_image" not in serializer.validated_data:
+            serializer.save()
+            return
+        old_variants = serializer.instance.profile_image_variants
+        profile = serializer.save(profile_image_variants={})
+        images.delete_variants(profile.profile_image.storage, old_variants)
+        images.schedule(process_profile_image, profile, "profile_image")
+
+
+class FollowListView(generics.ListAPIView):
+    """
+    Profiles on one side of the follows of profile `pk`, most recently
+    followed first. Pages are keyed on the follow id, so every page is an
+    index range scan on `(<relation_field>, -id)` whatever its depth.
+    """
+
+    serializer_class = UserProfileCompactSerializer
+    permission_classes = (IsAuthenticated | permissions.IsAdminUser,)
+    pagination_class = KeysetPagination
+    # `Follow` column holding profile `pk`, and the one holding the listed
+    # profiles.
+    relation_field = None
+    profile_field = None
+
+    def get_queryset(self):
+        profile = get_object_or_404(UserProfile, pk=self.kwargs["pk"])
+        return Follow.objects.filter(
+            **{self.relation_field: profile}
+        ).select_related(self.profile_field)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        profiles = [getattr(follow, self.profile_field) for follow in page]
+        serializer = self.get_serializer(profiles, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class UserProfileFollowersView(FollowListView):
+    """Profiles following profile `pk`"""
+
+    relation_field = "followee"
+    profile_field = "follower"
+
+
+class UserProfileFollowingView(FollowListView):
+    """Profiles followed by profile `pk`"""
+
+    relation_field = "follower"
+    profile_field = "followee"
+
+
+def change_follow(request, pk, follow: bool) -> Response:
+    """
+    Follows or unfollows profile `pk` as `request.user`.
+    """
+    follower = get_object_or_404(
+        UserProfile, pk=get_profile_id(request.user)
+    )
+    followee = get_object_or_404(UserProfile, pk=pk)
+    if follow:
+        services.follow(follower, followee)
+    else:
+        services.unfollow(follower, followee)
+    return Response(
+        {
+            "is_following": follow,
+            "followers_count": followee.followers_count,
+            "following_count": follower.following_count,
+        }
+    )
+
 
+@throttle_scope("follow")
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def add_follower(request, pk, *args, **kwargs):
-    current_profile = UserProfile.objects.get(user=request.user)
-    current_user = request.user
-    other_profile = UserProfile.objects.get(pk=pk)
-    other_user = other_profile.user
-    if current_user == other_user:
-        raise ValueError("You can not follow yourself")
-    other_profile.followers.add(current_user)
-    current_profile.following.add(other_user)
-    return redirect("user_profile:userprofile-detail", pk=other_profile.pk)
+    return change_follow(request, pk, follow=True)
 
 
+@throttle_scope("follow")
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def remove_follower(request, pk, *args, **kwargs):
-    current_profile = UserProfile.objects.get(user=request.user)
-    current_user = request.user
-    other_profile = UserProfile.objects.get(pk=pk)
-    other_user = other_profile.user
-    other_profile.followers.remove(current_user)
-    current_profile.following.remove(other_user)
-    return redirect("user_profile:userprofile-detail", pk=other_profile.pk)
+    return change_follow(request, pk, follow=False)